@@ -16,7 +16,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 # --- End of Path Correction ---
 
-from trading_system.utils.common import log
+from trading_system.utils.common import log, timeframe_to_offset
 from trading_system.utils import db_utils
 from trading_system.engine.portfolio_manager import PortfolioManager
 
@@ -36,6 +36,7 @@ class Backtest:
         self.backtest_config = backtest_config
         self.asset = self.strategy_config['asset']
         self.timeframe = self.strategy_config.get('timeframe', '1h')
+        self.bar_offset = timeframe_to_offset(self.timeframe) # Raises ValueError for an unsupported timeframe
 
         initial_cash = self.system_config.get('initial_cash', 100000.0)
 
@@ -72,18 +73,20 @@ class Backtest:
         log.info(f"--- Initializing Backtest for '{self.strategy.name}' on {self.asset} ({self.period.replace('_', ' ').title()}) ---")
 
     def _load_and_prepare_data(self) -> pd.DataFrame:
-        log.info(f"Loading 1-minute data for {self.asset}...")
-        df_1m = db_utils.fetch_candles_for_range(
-            self.system_config['database'], self.asset, self.start_date, self.end_date
-        )
-        if df_1m is None or df_1m.empty: return pd.DataFrame()
+        db_config = self.system_config['database']
+        if self.timeframe == '1m':
+            log.info(f"Loading 1-minute data for {self.asset}...")
+            df_bars = db_utils.fetch_candles_for_range(db_config, self.asset, self.start_date, self.end_date)
+        else:
+            # The database aggregates the 1-minute candles into the strategy's timeframe,
+            # so far fewer rows are transferred and no pandas resample is needed.
+            log.info(f"Loading {self.timeframe} bars for {self.asset}...")
+            df_bars = db_utils.fetch_resampled_candles(db_config, self.asset, self.start_date, self.end_date, self.timeframe)
+        if df_bars is None or df_bars.empty: return pd.DataFrame()
         
-        df_1m.rename(columns={'open_price': 'Open', 'high_price': 'High', 'low_price': 'Low', 'close_price': 'Close', 'volume': 'Volume'}, inplace=True)
-        resample_freq = self.timeframe.replace('m', 'T').replace('h', 'H')
-        agg_rules = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
-        df_resampled = df_1m.resample(resample_freq).agg(agg_rules).dropna()
-        log.info(f"Resampling complete. Resulted in {len(df_resampled)} bars.")
-        return df_resampled
+        df_bars.rename(columns={'open_price': 'Open', 'high_price': 'High', 'low_price': 'Low', 'close_price': 'Close', 'volume': 'Volume'}, inplace=True)
+        log.info(f"Data preparation complete. Resulted in {len(df_bars)} bars.")
+        return df_bars
 
     def run(self) -> dict | None:
         """
@@ -96,7 +99,9 @@ class Backtest:
             return None
 
         log.info(f"Generating signals for '{self.strategy.name}'...")
-        signals_df = self.strategy.generate_signals(historical_data.copy())
+        # Strategies return their signals and indicators as a new frame, which is
+        # joined onto the OHLCV data used by the simulation and the report.
+        signals_df = historical_data.join(self.strategy.generate_signals(historical_data))
         
         log.info(f"Starting simulation for '{self.strategy.name}'...")
         self._run_simulation(signals_df)
@@ -117,7 +122,7 @@ class Backtest:
     def _run_simulation(self, signals_df: pd.DataFrame):
         # Reset the equity curve to ensure it only contains data from this specific backtest run,
         # preventing any initial values (e.g., from live trading mode) from polluting the chart.
-        self.portfolio_manager.equity_curve = []
+        self.portfolio_manager.reset_equity_curve()
         position = 0 # Simple state tracker: 0 for flat, 1 for in-position
         for i in range(len(signals_df)):
             timestamp = signals_df.index[i]
@@ -170,16 +175,15 @@ class Backtest:
 
             # The master PM's equity curve is updated on_fill. For non-trade bars, we need to record the equity too.
             # This ensures the equity curve has a point for every bar in the backtest.
-            self.portfolio_manager.equity_curve.append((timestamp, self.portfolio_manager.get_total_equity()))
+            self.portfolio_manager.record_equity(timestamp, self.portfolio_manager.get_total_equity())
 
     def _calculate_performance_metrics(self) -> dict | None:
-        if not self.portfolio_manager.equity_curve:
-            log.warning(f"Equity curve for '{self.strategy.name}' is empty. Cannot calculate performance.")
-            return None
-
         # Use the new equity_curve_df property to get the DataFrame directly.
         # This avoids the AttributeError from trying to set a read-only property.
         equity_df = self.portfolio_manager.equity_curve_df
+        if equity_df.empty:
+            log.warning(f"Equity curve for '{self.strategy.name}' is empty. Cannot calculate performance.")
+            return None
 
         equity_df['Return'] = equity_df['Equity'].pct_change()
         
@@ -192,10 +196,7 @@ class Backtest:
         max_drawdown_pct = drawdown.min() * 100 if not drawdown.empty else 0
         
         trading_days_per_year = 252
-        timeframe_lower = self.timeframe.lower()
-        minutes_per_bar = 0
-        if 'h' in timeframe_lower: minutes_per_bar = int(timeframe_lower.replace('h', '')) * 60
-        elif 'm' in timeframe_lower: minutes_per_bar = int(timeframe_lower.replace('m', ''))
+        minutes_per_bar = pd.Timedelta(self.bar_offset).total_seconds() / 60
         
         sharpe_ratio = 0
         if minutes_per_bar > 0 and equity_df['Return'].std() != 0:
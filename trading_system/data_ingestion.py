@@ -16,7 +16,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 
 from trading_system.utils import db_utils
-from trading_system.utils.common import log
+from trading_system.utils.common import log, REQUEST_TIMEOUT_SECONDS
 
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'trading_system', 'config', 'config.yaml')
 BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
@@ -32,6 +32,9 @@ class DataIngestor:
         self.assets = self.ingestion_config['assets_to_track']
         self.interval = self.ingestion_config['base_interval']
         self.websockets = [] # To hold active websocket connections for graceful shutdown
+        # Closed candles are buffered and written in batches by a background thread,
+        # so the candles of all tracked assets (which close together) share one commit.
+        self.candle_writer = db_utils.RealtimeCandleWriter(self.db_config)
 
     def _is_candle_data_valid(self, candle_data: dict, asset: str) -> bool:
         """
@@ -74,7 +77,7 @@ class DataIngestor:
             params = {'symbol': asset.replace('-', ''), 'interval': self.interval, 'startTime': int(current_dt.timestamp() * 1000), 'limit': 1000}
             try:
                 log.info(f"⬇️  Fetching up to 1000 records for {asset} from {current_dt.strftime('%Y-%m-%d %H:%M:%S')}...")
-                response = requests.get(BINANCE_API_URL, params=params)
+                response = requests.get(BINANCE_API_URL, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -115,7 +118,7 @@ class DataIngestor:
     def backfill_asset(self, asset: str):
         log.info(f"--- Processing asset: {asset} ---")
         table_name = f"{asset.replace('-', '').lower()}_{self.interval}_candles"
-        conn = db_utils.get_db_connection(self.db_config)
+        conn = db_utils.get_pooled_connection(self.db_config)
         if not conn: return
         try:
             db_utils.create_candles_table(conn, table_name)
@@ -124,16 +127,31 @@ class DataIngestor:
             log.info(f"Starting backfill for {asset} from {start_dt}.")
             self._fetch_and_store(conn, asset, table_name, start_dt)
         finally:
-            if conn: conn.close()
+            db_utils.release_connection(conn)
+
+    def run_migration(self):
+        """Converts the NUMERIC columns of every tracked asset's candle table to DOUBLE PRECISION."""
+        log.info("--- Starting Candle Table Migration ---")
+        conn = db_utils.get_db_connection(self.db_config)
+        if not conn: return
+        try:
+            for asset in self.assets:
+                table_name = f"{asset.replace('-', '').lower()}_{self.interval}_candles"
+                db_utils.migrate_candles_table_to_double(conn, table_name)
+        finally:
+            conn.close()
+        log.info("--- Candle Table Migration Complete ---")
 
     async def run_live(self):
         log.info("--- Starting Live Data Ingestion Process ---")
+        self.candle_writer.start()
         tasks = [self.listen_to_asset(asset) for asset in self.assets]
         await asyncio.gather(*tasks)
 
-    def on_message(self, ws, message, asset, conn):
+    def on_message(self, ws, message, asset):
         """
-        Callback for WebSocket messages. Validates and then upserts candle data.
+        Callback for WebSocket messages. Validates closed candles and buffers them
+        for the real-time writer thread.
         """
         json_message = json.loads(message)
         k = json_message.get('k', {})
@@ -144,7 +162,8 @@ class DataIngestor:
 
         # --- Perform data quality check before inserting ---
         if self._is_candle_data_valid(json_message, asset):
-            db_utils.upsert_realtime_candle(conn, json_message, f"{asset.replace('-', '').lower()}_{self.interval}_candles")
+            table_name = f"{asset.replace('-', '').lower()}_{self.interval}_candles"
+            self.candle_writer.push(json_message, table_name)
         else:
             log.warning(f"Skipping insertion for {asset} due to data quality issues.")
 
@@ -153,24 +172,17 @@ class DataIngestor:
         Creates and manages a WebSocket connection for a single asset,
         running the blocking `run_forever` call in a separate thread.
         """
-        table_name = f"{asset.replace('-', '').lower()}_{self.interval}_candles"
         socket_url = f"wss://stream.binance.com:9443/ws/{asset.replace('-', '').lower()}@kline_{self.interval}"
-        
-        conn = db_utils.get_db_connection(self.db_config)
-        if not conn:
-            log.error(f"Cannot start listener for {asset}, DB connection failed.")
-            return
 
         ws_app = websocket.WebSocketApp(
             socket_url, 
-            on_message=lambda ws, msg: self.on_message(ws, msg, asset, conn)
+            on_message=lambda ws, msg: self.on_message(ws, msg, asset)
         )
         
         self.websockets.append(ws_app)
         loop = asyncio.get_event_loop()
         log.info(f"Starting WebSocket listener for {asset} in a background thread...")
         await loop.run_in_executor(None, ws_app.run_forever)
-        conn.close()
 
     async def run_sync(self):
         """
@@ -178,6 +190,7 @@ class DataIngestor:
         to minimize data gaps.
         """
         log.info("--- Starting Data Sync Process (Backfill + Live) ---")
+        self.candle_writer.start()
         loop = asyncio.get_event_loop()
         live_tasks = []
 
@@ -201,8 +214,9 @@ def main():
         '--mode', 
         type=str, 
         default='sync', 
-        choices=['backfill', 'live', 'sync'], 
-        help="The mode to run the script in. 'sync' (default) runs backfill then live."
+        choices=['backfill', 'live', 'sync', 'migrate'], 
+        help="The mode to run the script in. 'sync' (default) runs backfill then live. "
+             "'migrate' converts existing NUMERIC candle columns to DOUBLE PRECISION (run while ingestion is stopped)."
     )
     args = parser.parse_args()
 
@@ -218,6 +232,8 @@ def main():
     try:
         if args.mode == 'backfill':
             ingestor.run_backfill()
+        elif args.mode == 'migrate':
+            ingestor.run_migration()
         elif args.mode == 'live':
             asyncio.run(ingestor.run_live())
         elif args.mode == 'sync':
@@ -231,6 +247,7 @@ def main():
         for ws in ingestor.websockets:
             if ws and ws.sock and ws.sock.connected:
                 ws.close()
+        ingestor.candle_writer.stop()
         log.info("--- All connections closed. Exiting. ---")
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+# trading_system/engine/candle_buffer.py
+
+import numpy as np
+import pandas as pd
+
+class CandleBuffer:
+    """
+    A columnar store for OHLCV candles backed by NumPy arrays.
+
+    The live engine receives one candle per minute per strategy. Appending to a
+    pandas DataFrame re-runs dtype inference and copies the whole history every
+    time, so candles are instead written straight into preallocated arrays, which
+    grow geometrically when full. A DataFrame is only materialized on demand.
+
+    When `max_size` is set, the buffer keeps only the most recent `max_size`
+    candles, so its memory stays bounded over a long live session. The arrays are
+    then twice that size: old rows are dropped by advancing a start offset, and
+    once the write position reaches the end the live rows are copied to the front
+    of new arrays. This keeps the stored candles contiguous, so `to_frame` remains
+    a view, and rows already exposed through earlier frames are never overwritten.
+    """
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, initial_capacity: int = 1024, max_size: int = None, dtype=np.float64):
+        """
+        Initializes an empty buffer.
+
+        Args:
+            initial_capacity (int, optional): Number of rows to preallocate. Defaults to 1024.
+            max_size (int, optional): Maximum number of candles to keep. The oldest
+                                      candles are dropped beyond it. Defaults to None (unbounded).
+            dtype (optional): NumPy dtype of the OHLCV values. Defaults to np.float64.
+        """
+        if max_size is not None:
+            max_size = max(int(max_size), 1)
+            initial_capacity = 2 * max_size
+        capacity = max(int(initial_capacity), 1)
+        self.max_size = max_size
+        self.dtype = np.dtype(dtype)
+        self._timestamps = np.empty(capacity, dtype=np.int64) # UTC epoch nanoseconds
+        self._values = np.empty((capacity, len(self.COLUMNS)), dtype=self.dtype)
+        self._start = 0
+        self._size = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, max_size: int = None, dtype=np.float64) -> 'CandleBuffer':
+        """Creates a buffer pre-filled with an OHLCV DataFrame indexed by timestamp."""
+        if max_size is not None:
+            df = df.iloc[-max_size:]
+        buffer = cls(initial_capacity=2 * len(df), max_size=max_size, dtype=dtype)
+        if df.empty:
+            return buffer
+        index = df.index.tz_convert('UTC') if df.index.tz is not None else df.index.tz_localize('UTC')
+        size = len(df)
+        buffer._timestamps[:size] = index.asi8
+        buffer._values[:size] = df[cls.COLUMNS].to_numpy(dtype=buffer.dtype)
+        buffer._size = size
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _make_room(self):
+        """
+        Frees the row after the last candle by copying the candles to the front of
+        new arrays, which are twice as large if more than half of the current ones is in use.
+        """
+        start, size = self._start, self._size
+        capacity = len(self._timestamps)
+        if start == 0 or size > capacity // 2:
+            capacity *= 2
+        timestamps = np.empty(capacity, dtype=np.int64)
+        values = np.empty((capacity, len(self.COLUMNS)), dtype=self.dtype)
+        timestamps[:size] = self._timestamps[start:start + size]
+        values[:size] = self._values[start:start + size]
+        self._timestamps, self._values = timestamps, values
+        self._start = 0
+
+    @property
+    def last_timestamp_ns(self) -> int | None:
+        """The UTC epoch nanoseconds of the newest candle, or None if the buffer is empty."""
+        if self._size == 0:
+            return None
+        return int(self._timestamps[self._start + self._size - 1])
+
+    def append(self, timestamp_ns: int, open_: float, high: float, low: float, close: float, volume: float):
+        """Writes a single candle after the newest one (amortized O(1))."""
+        if self.max_size is not None and self._size == self.max_size:
+            # Drop the oldest candle.
+            self._start += 1
+            self._size -= 1
+        if self._start + self._size == len(self._timestamps):
+            self._make_room()
+        row = self._start + self._size
+        self._timestamps[row] = timestamp_ns
+        values = self._values[row]
+        values[0] = open_; values[1] = high; values[2] = low; values[3] = close; values[4] = volume
+        self._size += 1
+
+    def pop(self) -> list:
+        """Removes the newest candle and returns it as [timestamp_ns, Open, High, Low, Close, Volume]."""
+        if self._size == 0:
+            raise IndexError("pop from an empty CandleBuffer")
+        self._size -= 1
+        row = self._start + self._size
+        return [int(self._timestamps[row]), *self._values[row].tolist()]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the stored candles as a DataFrame indexed by UTC timestamp.
+        The data is a view of the buffer's arrays, so no OHLCV values are copied.
+        """
+        start, end = self._start, self._start + self._size
+        index = pd.to_datetime(self._timestamps[start:end], unit='ns', utc=True)
+        return pd.DataFrame(self._values[start:end], index=index, columns=self.COLUMNS, copy=False)
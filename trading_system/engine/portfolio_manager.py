@@ -4,7 +4,7 @@ import pandas as pd
 from datetime import datetime, timezone
 import threading
 from trading_system.utils.common import log
-from trading_system.engine.strategy_portfolio import StrategyPortfolio
+from trading_system.engine.strategy_portfolio import StrategyPortfolio, EQUITY_TIMESTAMP_FORMAT
 
 class PortfolioManager:
     """
@@ -32,7 +32,11 @@ class PortfolioManager:
         self.positions = initial_positions if initial_positions is not None else {}
         self.relevant_assets = relevant_assets
         self.market_values = {}
-        self.equity_curve = [(datetime.now(timezone.utc), initial_cash)]
+        self.equity_curve = []
+        # JSON-ready copy of the equity curve, formatted once per point as it is recorded,
+        # so that periodic dashboard snapshots never reformat the whole history.
+        self._equity_curve_formatted = []
+        self.record_equity(datetime.now(timezone.utc), initial_cash)
         self.trade_log = []
         self.lock = threading.Lock()
         self.total_commissions = 0.0
@@ -85,6 +89,28 @@ class PortfolioManager:
             traded_asset=config['asset']
         )
 
+    def record_equity(self, timestamp: datetime, equity: float):
+        """
+        Appends a point to the equity curve and to its pre-formatted JSON copy.
+        All writers of the equity curve go through this method, so the two lists stay in step.
+        """
+        self.equity_curve.append((timestamp, equity))
+        self._equity_curve_formatted.append({'Timestamp': timestamp.strftime(EQUITY_TIMESTAMP_FORMAT), 'Equity': equity})
+
+    def reset_equity_curve(self):
+        """Clears the equity curve and its pre-formatted JSON copy (e.g., before a backtest run)."""
+        self.equity_curve = []
+        self._equity_curve_formatted = []
+
+    def get_equity_curve_records(self, max_points: int = None) -> list[dict]:
+        """
+        Returns the JSON-ready equity curve as a list of {'Timestamp', 'Equity'} dicts,
+        limited to the most recent `max_points` entries if given.
+        """
+        if max_points is None:
+            return list(self._equity_curve_formatted)
+        return self._equity_curve_formatted[-max_points:]
+
     def get_strategy_portfolio(self, strategy_name: str) -> StrategyPortfolio:
         """Retrieves a registered strategy's sub-portfolio."""
         return self.strategy_portfolios.get(strategy_name)
@@ -163,7 +189,7 @@ class PortfolioManager:
             # --- 3. Update master equity curve post-trade ---
             self.update_market_values({asset: fill_price})
             total_equity = self.get_total_equity()
-            self.equity_curve.append((timestamp, total_equity))
+            self.record_equity(timestamp, total_equity)
             log.info(f"    -> New Master Equity: ${total_equity:,.2f}")
 
     def reconcile(self, actual_cash: float, actual_positions: dict):
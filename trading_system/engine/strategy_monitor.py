@@ -34,6 +34,7 @@ class StrategyMonitor:
         self.strategy = strategy
         self.sp = strategy_portfolio # Changed from pm to sp (StrategyPortfolio)
         self.asset = asset
+        self.base_asset = asset.split('-')[0] # e.g., 'BTC' for 'BTC-USDT'
         self.timeframe = timeframe
         self.start_time = datetime.now(timezone.utc)
 
@@ -43,20 +44,23 @@ class StrategyMonitor:
         self.report_filepath = os.path.join(OUTPUT_DIR, self.report_filename)
         log.info(f"Live monitoring report will be generated at: {self.report_filepath}")
 
-    def generate_report(self, strategy_state: str, latest_signal: int, current_price: float, price_data: pd.DataFrame):
+    def generate_report(self, strategy_state: str, latest_signal: int, current_price: float, price_data: pd.DataFrame, portfolio_snapshot: dict):
         """
         Generates and overwrites the HTML and JSON files with the latest strategy status.
+
+        The report only reads data: the portfolio values come from `portfolio_snapshot`,
+        taken by the decision logic when the bar was processed (see
+        `StrategyPortfolio.get_snapshot`), so a late report never writes an old price
+        back into the live sub-portfolio.
         """
-        # --- Calculate current portfolio values ---
-        base_asset = self.asset.split('-')[0]
-        position_qty = self.sp.positions.get(self.asset, 0.0)
-        
-        self.sp.update_market_value(current_price)
-        total_equity = self.sp.get_current_equity()
+        # --- Portfolio values at the time of the decision ---
+        base_asset = self.base_asset
+        position_qty = portfolio_snapshot['position_qty']
+        total_equity = portfolio_snapshot['equity']
         position_value = position_qty * current_price
 
         # --- Calculate performance metrics ---
-        initial_equity = self.sp.initial_equity
+        initial_equity = portfolio_snapshot['initial_equity']
         pnl = total_equity - initial_equity
         pnl_pct = (pnl / initial_equity) * 100 if initial_equity > 0 else 0.0
 
@@ -66,13 +70,13 @@ class StrategyMonitor:
         # --- Build HTML Content ---
         html_content = self._build_html(
             strategy_state, latest_signal, current_price, base_asset,
-            position_qty, position_value, total_equity, pnl, pnl_pct, fig
+            position_qty, position_value, total_equity, pnl, pnl_pct, fig, portfolio_snapshot
         )
 
         # Save a JSON summary for the main dashboard to consume.
         self._save_json_summary(
             strategy_state, latest_signal, current_price,
-            position_qty, total_equity, pnl, pnl_pct
+            position_qty, total_equity, pnl, pnl_pct, portfolio_snapshot
         )
 
         # --- Write to file ---
@@ -140,16 +144,13 @@ class StrategyMonitor:
         return fig
 
     def _save_json_summary(self, strategy_state: str, latest_signal: int, current_price: float,
-                           position_qty: float, total_equity: float, pnl: float, pnl_pct: float):
+                           position_qty: float, total_equity: float, pnl: float, pnl_pct: float, portfolio_snapshot: dict):
         """Saves a machine-readable JSON summary of the strategy's state."""
         summary_filepath = self.report_filepath.replace('.html', '.json')
 
-        # Convert equity curve to a JSON-friendly format (list of dicts)
-        equity_curve_data = []
-        if self.sp.equity_curve:
-            equity_df = pd.DataFrame(self.sp.equity_curve, columns=['Timestamp', 'Equity'])
-            equity_df['Timestamp'] = equity_df['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-            equity_curve_data = equity_df.to_dict(orient='records')
+        # The sub-portfolio formats each equity point once, when it is recorded,
+        # so no per-snapshot strftime pass over the whole curve is needed.
+        equity_curve_data = self.sp.get_equity_curve_records()
 
         summary_data = {
             'strategy_name': self.strategy.name,
@@ -157,11 +158,11 @@ class StrategyMonitor:
             'timeframe': self.timeframe,
             'last_update': datetime.now(timezone.utc).isoformat(),
             'strategy_state': strategy_state,
-            'initial_equity': self.sp.initial_equity,
+            'initial_equity': portfolio_snapshot['initial_equity'],
             'total_equity': total_equity,
             'pnl': pnl,
             'pnl_pct': pnl_pct,
-            'total_trades': len(self.sp.trade_log),
+            'total_trades': portfolio_snapshot['total_trades'],
             'report_html_file': os.path.basename(self.report_filepath),
             'equity_curve': equity_curve_data
         }
@@ -174,7 +175,7 @@ class StrategyMonitor:
 
     def _build_html(self, strategy_state: str, latest_signal: int, current_price: float, base_asset: str,
                     position_qty: float, position_value: float, total_equity: float,
-                    pnl: float, pnl_pct: float, fig: go.Figure) -> str:
+                    pnl: float, pnl_pct: float, fig: go.Figure, portfolio_snapshot: dict) -> str:
         """Builds the full HTML content for the report, including a trade log."""
 
         metrics_data = {
@@ -185,7 +186,7 @@ class StrategyMonitor:
                 "Current Price": f"${current_price:,.2f}"
             },
             "Portfolio (Allocated)": {
-                "Cash (USDT)": f"${self.sp.cash:,.2f}",
+                "Cash (USDT)": f"${portfolio_snapshot['cash']:,.2f}",
                 f"Position ({base_asset})": f"{position_qty:.8f}",
                 "Position Value": f"${position_value:,.2f}",
                 "Total Equity": f"${total_equity:,.2f}"
@@ -193,7 +194,7 @@ class StrategyMonitor:
             "Performance Since Start": {
                 "Total P&L": f"${pnl:,.2f}",
                 "Total Return": f"{pnl_pct:+.2f}%",
-                "Total Trades": len(self.sp.trade_log)
+                "Total Trades": portfolio_snapshot['total_trades']
             }
         }
 
@@ -3,6 +3,9 @@
 from datetime import datetime, timezone
 from trading_system.utils.common import log
 
+# Timestamp format used when an equity curve is serialized for the dashboard.
+EQUITY_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
 class StrategyPortfolio:
     """
     Manages the virtual account state for a single, isolated strategy.
@@ -24,9 +27,21 @@ class StrategyPortfolio:
         self.risk_per_trade_pct = risk_per_trade_pct
         self.traded_asset = traded_asset
         self.trade_log = []
-        self.equity_curve = [(datetime.now(timezone.utc), initial_equity)] # Start with initial equity
+        self.equity_curve = []
+        # JSON-ready copy of the equity curve, formatted once per point as it is recorded.
+        self._equity_curve_formatted = []
+        self._record_equity(datetime.now(timezone.utc), initial_equity) # Start with initial equity
         log.info(f"  [Sub-Portfolio] Created for '{strategy_name}' with initial equity ${initial_equity:,.2f}")
 
+    def _record_equity(self, timestamp: datetime, equity: float):
+        """Appends a point to the equity curve and to its pre-formatted JSON copy."""
+        self.equity_curve.append((timestamp, equity))
+        self._equity_curve_formatted.append({'Timestamp': timestamp.strftime(EQUITY_TIMESTAMP_FORMAT), 'Equity': equity})
+
+    def get_equity_curve_records(self) -> list[dict]:
+        """Returns the JSON-ready equity curve as a list of {'Timestamp', 'Equity'} dicts."""
+        return list(self._equity_curve_formatted)
+
     def get_current_equity(self) -> float:
         """Calculates the current total equity of the sub-portfolio."""
         position_value = self.positions.get(self.traded_asset, 0) * self.market_values.get(self.traded_asset, 0)
@@ -37,6 +52,20 @@ class StrategyPortfolio:
         self.market_values[self.traded_asset] = price
         self.equity = self.get_current_equity()
 
+    def get_snapshot(self) -> dict:
+        """
+        Returns the values the monitoring report needs, captured at the current moment.
+        The report is rendered later on another thread, so it reads this copy instead
+        of the live sub-portfolio, which the next bar may already have changed.
+        """
+        return {
+            'cash': self.cash,
+            'position_qty': self.positions.get(self.traded_asset, 0.0),
+            'equity': self.equity,
+            'initial_equity': self.initial_equity,
+            'total_trades': len(self.trade_log)
+        }
+
     def calculate_position_size(self) -> float:
         """
         Calculates the position size in quote currency (e.g., USDT) for a new trade.
@@ -74,5 +103,5 @@ class StrategyPortfolio:
 
         # 4. Recalculate equity and record it.
         self.equity = self.get_current_equity()
-        self.equity_curve.append((timestamp, self.equity))
+        self._record_equity(timestamp, self.equity)
         log.info(f"  [{self.strategy_name}] Sub-Portfolio Updated. New Equity: ${self.equity:,.2f}, New Cash: ${self.cash:,.2f}")
\ No newline at end of file
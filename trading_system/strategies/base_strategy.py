@@ -11,6 +11,11 @@ class Strategy(ABC):
     It ensures that the trading engine can interact with any strategy in a consistent way.
     """
 
+    # Number of most recent bars the live engine passes to `generate_signals`.
+    # Strategies whose indicators need a longer history override it, and None
+    # passes the full history (e.g., for signals that depend on the whole path).
+    warmup_bars: int | None = 500
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -29,11 +34,15 @@ class Strategy(ABC):
         """
         The core logic of the strategy. Receives historical market data and returns trading signals.
 
+        Implementations must not modify `data`: callers pass their own frames
+        (e.g., a view of the live bar buffer) without making a defensive copy.
+
         Args:
             data (pd.DataFrame): A DataFrame containing at least OHLCV data, indexed by timestamp.
 
         Returns:
-            pd.DataFrame: The input DataFrame with an added 'signal' column.
+            pd.DataFrame: A new DataFrame with the same index as `data`, containing a
+                          'signal' column and, optionally, indicator columns for analysis.
                           The 'signal' column should contain:
                           -  1: for a buy signal
                           - -1: for a sell signal
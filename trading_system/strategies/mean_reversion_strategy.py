@@ -6,6 +6,22 @@ import pandas_ta as ta
 from trading_system.strategies.base_strategy import Strategy
 from trading_system.utils.common import log
 
+# The numba kernel is imported on first use. None means "not loaded yet",
+# False means numba is unavailable and the pure-Python filter is used.
+_kalman_kernel = None
+
+def _load_kalman_kernel():
+    """Lazily imports the compiled Kalman filter kernel, returning None if numba is not installed."""
+    global _kalman_kernel
+    if _kalman_kernel is None:
+        try:
+            from trading_system.strategies.signal_kernels import kalman_mean
+            _kalman_kernel = kalman_mean
+        except ImportError:
+            log.warning("numba is not installed. MeanReversion will use its pure-Python Kalman filter.")
+            _kalman_kernel = False
+    return _kalman_kernel or None
+
 class MeanReversion(Strategy):
     """
     Implements a single-asset, LONG-ONLY mean-reversion strategy based on the
@@ -15,6 +31,10 @@ class MeanReversion(Strategy):
     A Kalman Filter is used to dynamically estimate this drifting mean in real-time.
     """
 
+    # The position state is carried forward from the last entry/exit event, which
+    # can lie arbitrarily far back, so signals are generated over the full history.
+    warmup_bars = None
+
     @property
     def name(self) -> str:
         return self._name
@@ -49,22 +69,24 @@ class MeanReversion(Strategy):
         """
         Q = self.kalman_process_noise
         R = self.kalman_measurement_noise
+        values = prices.to_numpy(dtype=np.float64)
 
-        x_hat = np.zeros(len(prices))
-        P = np.zeros(len(prices))
-        x_hat_minus = np.zeros(len(prices))
-        P_minus = np.zeros(len(prices))
-        K = np.zeros(len(prices))
+        # Prefer the compiled kernel, which runs the whole filter in a single native pass.
+        kalman_kernel = _load_kalman_kernel()
+        if kalman_kernel is not None:
+            return pd.Series(kalman_kernel(values, Q, R), index=prices.index)
 
-        x_hat[0] = prices.iloc[0]
-        P[0] = 1.0
+        x_hat = np.zeros(len(values))
+        x_hat[0] = values[0]
+        P = 1.0
 
-        for t in range(1, len(prices)):
-            x_hat_minus[t] = x_hat[t-1]
-            P_minus[t] = P[t-1] + Q
-            K[t] = P_minus[t] / (P_minus[t] + R)
-            x_hat[t] = x_hat_minus[t] + K[t] * (prices.iloc[t] - x_hat_minus[t])
-            P[t] = (1 - K[t]) * P_minus[t]
+        # Only the previous estimate and variance are needed at each step, so they are
+        # kept as scalars, and prices are read from the NumPy array rather than via .iloc.
+        for t in range(1, len(values)):
+            P_minus = P + Q
+            K = P_minus / (P_minus + R)
+            x_hat[t] = x_hat[t-1] + K * (values[t] - x_hat[t-1])
+            P = (1 - K) * P_minus
 
         return pd.Series(x_hat, index=prices.index)
 
@@ -75,9 +97,12 @@ class MeanReversion(Strategy):
         if not all(col in data.columns for col in ['Open', 'High', 'Low', 'Close']):
             raise ValueError("Input DataFrame must contain OHLC columns.")
 
+        # Signals and indicators go into a new DataFrame; the input data is never modified.
+        signals = pd.DataFrame(index=data.index)
+
         if data.empty:
-            data['signal'] = 0
-            return data
+            signals['signal'] = 0
+            return signals
 
         # --- 1. Calculate Z-Score ---
         # Work with log prices to stabilize variance.
@@ -102,14 +127,14 @@ class MeanReversion(Strategy):
             if atr is not None:
                 atr_ma = atr.rolling(window=self.lookback_window, min_periods=20).mean()
                 volatility_filter = atr < (atr_ma * self.atr_multiplier)
-                data['atr_ma_threshold'] = atr_ma * self.atr_multiplier # Add to df for analysis
+                signals['atr_ma_threshold'] = atr_ma * self.atr_multiplier # Add to df for analysis
 
         if self.use_trend_filter:
             # Trend filter: Only take long mean-reversion trades if the asset is in a long-term uptrend.
             # This helps avoid "catching a falling knife".
             long_ma = ta.sma(data['Close'], length=self.trend_ma_period)
             trend_filter = data['Close'] > long_ma
-            data['long_ma'] = long_ma # Add to df for analysis
+            signals['long_ma'] = long_ma # Add to df for analysis
 
         # --- 3. Generate Signals from State Changes ---
         # This is a two-step process to convert state (are we in a position?) to events (buy/sell signals).
@@ -130,10 +155,10 @@ class MeanReversion(Strategy):
 
         # Step B: Generate event signals by finding where the state changes.
         # A change from 0 to 1 is a buy signal (1). A change from 1 to 0 is a sell signal (-1).
-        signals = position_state.diff().fillna(0)
+        state_changes = position_state.diff().fillna(0)
         
-        data['dynamic_mean'] = np.exp(dynamic_mean) # Convert log-mean back to price for plotting
-        data['z_score'] = z_score
-        data['signal'] = signals.astype(int)
+        signals['dynamic_mean'] = np.exp(dynamic_mean) # Convert log-mean back to price for plotting
+        signals['z_score'] = z_score
+        signals['signal'] = state_changes.astype(int)
         
-        return data
\ No newline at end of file
+        return signals
\ No newline at end of file
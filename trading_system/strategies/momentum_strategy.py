@@ -37,6 +37,9 @@ class MomentumStrategy(Strategy):
         self.macd_slow = int(self._params.get('macd_slow', 26))
         self.macd_signal = int(self._params.get('macd_signal', 9))
 
+        # EMA, ADX and MACD are recursive, so keep enough bars for them to converge.
+        self.warmup_bars = max(Strategy.warmup_bars, 10 * max(self.long_window, self.macd_slow, self.adx_length))
+
         log.info(f"Strategy '{self.name}' initialized with MA Type: {self.ma_type.upper()}, ADX Filter: {self.use_adx_filter}, MACD Filter: {self.use_macd_filter}")
 
         if self.short_window >= self.long_window:
@@ -57,9 +60,12 @@ class MomentumStrategy(Strategy):
         if not isinstance(data, pd.DataFrame) or not all(col in data.columns for col in ['High', 'Low', 'Close']):
             raise ValueError("Input data must be a pandas DataFrame with High, Low, and Close columns.")
         
+        # Signals and indicators go into a new DataFrame; the input data is never modified.
+        signals = pd.DataFrame(index=data.index)
+        signals['signal'] = 0
+
         if data.empty:
-            data['signal'] = 0
-            return data
+            return signals
         
         # --- 1. Calculate Core Crossover Indicator ---
         if self.ma_type == 'ema':
@@ -90,8 +96,7 @@ class MomentumStrategy(Strategy):
         
         # --- FIX: Add a check to ensure MAs were calculated ---
         if short_ma is None or long_ma is None:
-            data['signal'] = 0 # Not enough data, so no signal
-            return data
+            return signals # Not enough data, so no signal
 
         enter_long = (short_ma > long_ma) & (short_ma.shift(1) <= long_ma.shift(1))
         exit_long = (short_ma < long_ma) & (short_ma.shift(1) >= long_ma.shift(1))
@@ -109,12 +114,8 @@ class MomentumStrategy(Strategy):
             enter_long &= macd_confirmation
 
         # --- 4. Generate Final Signals ---
-        # Create a new DataFrame to hold the signals, initialized to 0 (hold).
-        signals = pd.DataFrame(index=data.index)
-        signals['signal'] = 0
+        # The signal column is initialized to 0 (hold).
         signals.loc[enter_long, 'signal'] = 1
         signals.loc[exit_long, 'signal'] = -1
         
-        data['signal'] = signals['signal']
-        
-        return data
\ No newline at end of file
+        return signals
\ No newline at end of file
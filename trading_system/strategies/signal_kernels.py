@@ -0,0 +1,55 @@
+# trading_system/strategies/signal_kernels.py
+
+"""
+Numba-compiled numeric kernels used by the strategies.
+
+Every kernel is declared with an explicit signature and `cache=True`, so it is
+compiled once at decoration time and the machine code is stored under
+__pycache__. Later process restarts load the cached artifact instead of paying
+the JIT compilation again. Strategies import this module lazily, on their first
+call to `generate_signals`, to keep numba off the engine's startup path.
+"""
+
+import numpy as np
+from numba import njit
+
+@njit('int8[:](int64, int64, float64)', cache=True)
+def fill_test_signals(num_bars, signal_interval, hold_probability):
+    """
+    Builds the TestStrategy signal vector.
+
+    At every `signal_interval` bars a random draw decides whether to trade or to
+    hold. Trades alternate between BUY (1) and SELL (-1), starting with a BUY.
+
+    Returns:
+        np.ndarray: An int8 array of length `num_bars` with values 1, -1 or 0.
+    """
+    signals = np.zeros(num_bars, dtype=np.int8)
+    next_signal = 1
+    for i in range(signal_interval, num_bars, signal_interval):
+        if np.random.random() >= hold_probability:
+            signals[i] = next_signal
+            next_signal = -next_signal
+    return signals
+
+@njit('float64[:](float64[:], float64, float64)', cache=True)
+def kalman_mean(prices, process_noise, measurement_noise):
+    """
+    Estimates the drifting mean of a price series with a 1D Kalman filter
+    (random-walk state, noisy observations), in a single pass.
+
+    Returns:
+        np.ndarray: The filtered mean for every bar, starting at the first price.
+    """
+    num_bars = prices.shape[0]
+    x_hat = np.empty(num_bars)
+    if num_bars == 0:
+        return x_hat
+    x_hat[0] = prices[0]
+    p = 1.0
+    for t in range(1, num_bars):
+        p_minus = p + process_noise
+        k = p_minus / (p_minus + measurement_noise)
+        x_hat[t] = x_hat[t - 1] + k * (prices[t] - x_hat[t - 1])
+        p = (1.0 - k) * p_minus
+    return x_hat
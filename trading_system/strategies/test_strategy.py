@@ -5,6 +5,22 @@ import numpy as np
 from trading_system.strategies.base_strategy import Strategy
 from trading_system.utils.common import log
 
+# The numba kernel is imported on first use. None means "not loaded yet",
+# False means numba is unavailable and the numpy implementation is used.
+_signal_kernel = None
+
+def _load_signal_kernel():
+    """Lazily imports the compiled signal kernel, returning None if numba is not installed."""
+    global _signal_kernel
+    if _signal_kernel is None:
+        try:
+            from trading_system.strategies.signal_kernels import fill_test_signals
+            _signal_kernel = fill_test_signals
+        except ImportError:
+            log.warning("numba is not installed. TestStrategy will use its numpy signal generator.")
+            _signal_kernel = False
+    return _signal_kernel or None
+
 class TestStrategy(Strategy):
     """
     A simple test strategy designed to generate signals at a fixed interval
@@ -13,6 +29,10 @@ class TestStrategy(Strategy):
     of HOLDING (0) the position instead of trading.
     """
 
+    # Signal points are counted from the first bar of the data, so a fixed-length
+    # window would keep the latest bar on the same point; use the full history.
+    warmup_bars = None
+
     @property
     def name(self) -> str:
         return self._name
@@ -38,19 +58,23 @@ class TestStrategy(Strategy):
         if not isinstance(data, pd.DataFrame):
             raise ValueError("Input data must be a pandas DataFrame.")
 
-        if data.empty:
-            data['signal'] = 0
-            return data
+        return pd.DataFrame({'signal': self._build_signals(len(data))}, index=data.index)
+
+    def _build_signals(self, num_bars: int) -> np.ndarray:
+        """Builds the int8 signal vector for `num_bars` bars."""
+        # Prefer the compiled kernel, which builds the whole signal vector in a single pass.
+        signal_kernel = _load_signal_kernel()
+        if signal_kernel is not None:
+            return signal_kernel(num_bars, self.signal_interval, self.hold_probability)
 
-        # Start with a series of all zeros (no signal).
-        signals = pd.Series(0, index=data.index, dtype=int)
+        # Start with an array of all zeros (no signal).
+        signals = np.zeros(num_bars, dtype=np.int8)
 
         # Get the integer locations (iloc) where a signal *could* be generated.
-        signal_indices = np.arange(self.signal_interval, len(data), self.signal_interval)
+        signal_indices = np.arange(self.signal_interval, num_bars, self.signal_interval)
 
         if len(signal_indices) == 0:
-            data['signal'] = signals
-            return data
+            return signals
 
         # For each potential signal point, decide randomly whether to trade or hold.
         rands = np.random.rand(len(signal_indices))
@@ -61,21 +85,19 @@ class TestStrategy(Strategy):
 
         # If no trades are to be made, we are done.
         if len(trade_indices) == 0:
-            data['signal'] = signals
-            return data
+            return signals
 
         # Generate the alternating BUY (1) and SELL (-1) signals only for the
         # indices that were not filtered out by the hold probability.
         num_trades = len(trade_indices)
 
-        # This clever line of numpy code does the following:
-        # 1. `np.arange(num_trades)`: Creates a sequence [0, 1, 2, ...].
-        # 2. `% 2`: Takes the modulus, resulting in [0, 1, 0, 1, ...].
-        # 3. `np.where(..., 1, -1)`: Maps 0 to a BUY signal (1) and 1 to a SELL signal (-1).
-        # This ensures the sequence of actual trades is always alternating, starting with a BUY.
-        signal_values = np.where(np.arange(num_trades) % 2 == 0, 1, -1)
+        # Even positions get a BUY (1) and odd positions a SELL (-1), so the sequence of
+        # actual trades always alternates, starting with a BUY. Two strided writes into a
+        # single allocation avoid building temporary arange/modulo/where arrays.
+        signal_values = np.empty(num_trades, dtype=np.int8)
+        signal_values[0::2] = 1
+        signal_values[1::2] = -1
 
         # Place the generated signal values (1 or -1) at the correct integer locations.
-        signals.iloc[trade_indices] = signal_values
-        data['signal'] = signals
-        return data
+        signals[trade_indices] = signal_values
+        return signals
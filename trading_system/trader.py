@@ -8,12 +8,17 @@ and runs each strategy in its own asynchronous task, connecting to a real-time d
 
 import sys
 import os
+import argparse
 import yaml
 import importlib
+import functools
+import math
+import pickle
+import queue
 import asyncio
-import json
-import random
+import orjson
 import websocket
+import numpy as np
 import pandas as pd
 import threading
 import time 
@@ -23,60 +28,113 @@ from datetime import datetime, timedelta, timezone
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 
-from trading_system.utils.common import log
+from trading_system.utils.common import log, timeframe_to_offset
 from trading_system.utils import db_utils
 from trading_system.engine.execution_handler import MockExecutionHandler, BinanceExecutionHandler
 from trading_system.engine.portfolio_manager import PortfolioManager
 from trading_system.engine.strategy_portfolio import StrategyPortfolio
 from trading_system.engine.strategy_monitor import StrategyMonitor
+from trading_system.engine.candle_buffer import CandleBuffer
 from trading_system.dashboard_generator import main as generate_dashboard
 
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'trading_system', 'config', 'config.yaml')
 MONITOR_DIR = os.path.join(PROJECT_ROOT, 'output', 'live_monitoring')
+# The dashboard cannot usefully render more points than this, so longer
+# equity curves are truncated to their most recent section.
+MAX_EQUITY_CURVE_POINTS = 10_000
+ONE_MINUTE_NS = 60_000_000_000
+# Completed bars kept in memory per strategy (30 days of 1-minute bars). Older
+# bars are dropped so that a long-running session uses a bounded amount of memory.
+# Strategies with `warmup_bars = None` are not capped: their signals depend on the
+# whole path from the first bar (e.g., a carried position state or a bar count),
+# so a window whose start moves every bar would change them.
+MAX_LIVE_BARS = 43_200
+# Completed bars are stored as float32, which halves the memory the strategies'
+# indicators read per bar. Its ~7 significant digits resolve crypto prices well below
+# their tick-to-tick noise; order prices and sizes use the float64 candle values instead.
+BAR_DTYPE = np.float32
+# Maximum number of raw WebSocket messages decoded in one dispatcher pass.
+MAX_MESSAGE_BATCH = 256
+# Delay before websocket-client reconnects a dropped market data connection.
+WS_RECONNECT_DELAY_SECONDS = 5
 
 class TradingState:
     SEARCHING = "SEARCHING"
     IN_POSITION = "IN_POSITION"
 
-def validate_total_cash_allocation(config_path: str):
+def load_config(config_path: str) -> dict:
     """
-    Loads all strategy configurations and validates that the sum of
-    'cash_allocation_pct' does not exceed 100%.
+    Reads and parses the main YAML config file.
+
+    The parsed dict is pickled to '<config_path>.cache' together with the config
+    file's modification time and size. Later starts load that pickle instead of
+    parsing the YAML again, as long as the config file has not changed.
+    When parsing is needed, the C-accelerated libyaml loader is used if PyYAML was built with it.
     """
+    cache_path = f"{config_path}.cache"
+    config_stat = os.stat(config_path)
+    fingerprint = (config_stat.st_mtime_ns, config_stat.st_size)
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('fingerprint') == fingerprint:
+            return cached['config']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning(f"Ignoring unreadable config cache '{cache_path}': {e}")
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
     with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    
+        config = yaml.load(f, Loader=loader)
+
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'config': config}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        log.warning(f"Could not write config cache '{cache_path}': {e}")
+    return config
+
+def validate_total_cash_allocation(config: dict):
+    """
+    Validates that the sum of 'cash_allocation_pct' across all strategy
+    configurations does not exceed 100%.
+    """
     all_strategies = config.get('strategies', [])
     if not all_strategies:
         log.warning("No strategies found in config to validate cash allocation.")
         return
 
-    total_allocation = sum(sc.get('cash_allocation_pct', 0) for sc in all_strategies)
+    # fsum adds the percentages without accumulating floating-point rounding errors.
+    total_allocation = math.fsum(sc.get('cash_allocation_pct', 0) for sc in all_strategies)
 
     log.info(f"Validating cash allocation... Total allocated across all strategies: {total_allocation:.2f}%")
     if total_allocation > 100.0:
         log.error(f"FATAL: Total cash allocation across all strategies is {total_allocation:.2f}%, which exceeds 100%.")
         log.error("Please adjust 'cash_allocation_pct' in your config.yaml file. Exiting.")
         sys.exit(1)
-    elif total_allocation < 99.9: # Use a small buffer for float precision
+    elif total_allocation < 99.9: # Allow for percentages that are themselves rounded in the config
         log.warning(f"Total cash allocation is {total_allocation:.2f}%. Note that {100 - total_allocation:.2f}% of capital is unallocated and will not be used.")
 
 # --- Reconciliation Loop ---
-def reconciliation_loop(portfolio_manager: PortfolioManager, execution_handler, interval: int):
+async def reconciliation_loop(portfolio_manager: PortfolioManager, execution_handler, interval: int):
     """
     Periodically checks the broker's account status and reconciles the
     master portfolio manager state.
     """
-    # This loop runs in a separate thread to avoid blocking the main async event loop.
-    # It ensures that the system's internal state doesn't drift from the broker's reality.
+    # This loop runs as a task on the main event loop and ensures that the system's
+    # internal state doesn't drift from the broker's reality. The broker request is
+    # blocking HTTP, and reconciling waits for the portfolio lock, so both run in a
+    # worker thread to keep the event loop free.
     while True:
         try:
-            log.info(f"--- [Reconciler] Waking up ---")
-            actual_status = execution_handler.get_account_status()
-            portfolio_manager.reconcile(actual_status.get('cash', 0.0), actual_status.get('positions', {}))
+            log.info("--- [Reconciler] Waking up ---")
+            actual_status = await asyncio.to_thread(execution_handler.get_account_status)
+            await asyncio.to_thread(portfolio_manager.reconcile, actual_status.get('cash', 0.0), actual_status.get('positions', {}))
         except Exception as e:
-            log.error(f"[Reconciler] Error during reconciliation: {e}", exc_info=True)
-        time.sleep(interval)
+            log.error("[Reconciler] Error during reconciliation: %s", e, exc_info=True)
+        await asyncio.sleep(interval)
 
 # --- Master Portfolio Monitor Loop ---
 def save_master_portfolio_summary(portfolio_manager: PortfolioManager):
@@ -84,13 +142,9 @@ def save_master_portfolio_summary(portfolio_manager: PortfolioManager):
     os.makedirs(MONITOR_DIR, exist_ok=True)
     summary_filepath = os.path.join(MONITOR_DIR, 'master_summary.json')
 
-    equity_curve_data = []
-    if portfolio_manager.equity_curve:
-        # Convert the list of (timestamp, equity) tuples to a DataFrame for easy manipulation.
-        equity_df = pd.DataFrame(portfolio_manager.equity_curve, columns=['Timestamp', 'Equity'])
-        # Format timestamp to a standard string format for JSON serialization.
-        equity_df['Timestamp'] = equity_df['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-        equity_curve_data = equity_df.to_dict(orient='records')
+    # The portfolio manager formats each equity point as it is recorded, so the
+    # snapshot only needs to take the most recent section of that list.
+    equity_curve_data = portfolio_manager.get_equity_curve_records(MAX_EQUITY_CURVE_POINTS)
 
     total_equity = portfolio_manager.get_total_equity() # This is a snapshot value
     pnl = total_equity - portfolio_manager.initial_cash
@@ -106,8 +160,8 @@ def save_master_portfolio_summary(portfolio_manager: PortfolioManager):
     }
 
     try:
-        with open(summary_filepath, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f)
+        with open(summary_filepath, 'wb') as f:
+            f.write(orjson.dumps(summary_data))
     except Exception as e:
         log.error(f"Error writing master portfolio summary: {e}", exc_info=True)
 
@@ -128,170 +182,336 @@ def dashboard_generator_loop(interval: int):
             log.error(f"[Dashboard] Error during generation: {e}", exc_info=True)
         time.sleep(interval)
 
+# --- Shared Market Data Stream ---
+async def market_data_stream(subscribers: dict):
+    """
+    Maintains the single WebSocket connection shared by all strategies.
+
+    Binance's combined stream endpoint multiplexes the 1-minute kline streams of
+    every traded asset over one connection. The WebSocket thread only enqueues the
+    raw messages; a dispatcher thread decodes them in batches, demultiplexes the
+    closed candles by stream name and fans them out to the queue of each subscribed strategy.
+
+    Args:
+        subscribers (dict): Maps a stream symbol (e.g., 'btcusdt') to the list of
+                            asyncio.Queue objects of the strategies trading it.
+    """
+    streams = '/'.join(f"{symbol}@kline_1m" for symbol in subscribers)
+    socket_url = f"wss://stream.binance.com:9443/stream?streams={streams}"
+
+    # This dictionary holds the connection state shared by the WebSocket callbacks.
+    stream_state = {
+        'last_ws_message_time': time.monotonic_ns(), # Monotonic clock, only used to measure silence
+        'has_connected': False
+    }
+
+    loop = asyncio.get_running_loop()
+    message_queue = queue.SimpleQueue()
+    dispatcher_thread = threading.Thread(target=dispatch_messages, args=(message_queue, subscribers, loop), daemon=True)
+    dispatcher_thread.start()
+
+    log.info(f"[MarketData] Connecting to websocket: {socket_url}")
+    ws = websocket.WebSocketApp(
+        socket_url,
+        on_open=lambda ws: on_open(ws, stream_state),
+        on_message=lambda ws, msg: on_message(ws, msg, message_queue, stream_state),
+        on_error=lambda ws, err: on_error(ws, err),
+        on_close=lambda ws, code, msg: on_close(ws, code, msg)
+    )
+    # websocket-client reconnects by itself, WS_RECONNECT_DELAY_SECONDS after the connection
+    # drops, and its ping thread detects connections that died silently. UTF-8 validation
+    # of every text frame in pure Python is skipped, as orjson validates while parsing.
+    run_forever = functools.partial(
+        ws.run_forever,
+        reconnect=WS_RECONNECT_DELAY_SECONDS,
+        ping_interval=30,
+        ping_timeout=10,
+        skip_utf8_validation=True
+    )
+    try:
+        while True:
+            # The `run_forever()` method is a blocking call. To prevent it from
+            # halting the entire asyncio event loop (which would stop all the
+            # strategies), we run it in a separate thread managed by the event loop's executor.
+            await loop.run_in_executor(None, run_forever)
+
+            # `run_forever` only returns if its reconnect loop gave up, so start it again.
+            log.error("[MarketData] Websocket loop exited. Restarting in %d seconds...", WS_RECONNECT_DELAY_SECONDS)
+            await asyncio.sleep(WS_RECONNECT_DELAY_SECONDS)
+    finally:
+        ws.close()
+        message_queue.put(None) # Stops the dispatcher thread.
+        log.info("[MarketData] Market data stream has terminated.")
+
+def on_open(ws, stream_state: dict):
+    """Callback executed when the WebSocket connection is successfully opened."""
+    if stream_state['has_connected']:
+        log.info("[MarketData] ✅ Successfully reconnected to websocket.")
+    else:
+        log.info("[MarketData] Websocket connection opened.")
+        stream_state['has_connected'] = True
+
+def on_error(ws, error):
+    """Callback executed when a WebSocket error occurs."""
+    log.error("[MarketData] Websocket error: %s", error)
+
+def on_close(ws, close_status_code, close_msg):
+    """Callback executed when the WebSocket connection is closed."""
+    log.warning("[MarketData] Websocket connection closed. Code: %s, Msg: %s", close_status_code, close_msg)
+
+def on_message(ws, message, message_queue: queue.SimpleQueue, stream_state: dict):
+    """
+    Callback for incoming WebSocket messages.
+    This is the entry point for all real-time market data. The raw message is
+    handed to the dispatcher thread, so the WebSocket thread can go straight back
+    to reading frames, even during a burst of messages.
+    """
+    stream_state['last_ws_message_time'] = time.monotonic_ns()
+    message_queue.put(message)
+
+def dispatch_messages(message_queue: queue.SimpleQueue, subscribers: dict, loop):
+    """
+    Decodes the queued WebSocket messages and forwards the closed candles to the strategies.
+
+    Each pass drains up to MAX_MESSAGE_BATCH waiting messages. Binance sends an update
+    for the forming candle every few seconds, so most messages are discarded here, and
+    all closed candles of a batch are handed to the event loop in a single call.
+    Combined stream messages are wrapped as {"stream": "<symbol>@kline_1m", "data": {...}}.
+    """
+    while True:
+        batch = [message_queue.get()]
+        try:
+            while len(batch) < MAX_MESSAGE_BATCH:
+                batch.append(message_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        closed_candles = []
+        for message in batch:
+            if message is None:
+                return
+            try:
+                json_message = orjson.loads(message)
+                candle = json_message.get('data', {}).get('k')
+                # We only care about candles that have officially closed.
+                if candle and candle['x']:
+                    closed_candles.append((json_message['stream'].split('@', 1)[0], candle))
+            except Exception as e:
+                log.error("[MarketData] Error processing message: %s", e, exc_info=True)
+
+        if closed_candles:
+            try:
+                # asyncio queues are not thread-safe, so the hand-off to the
+                # strategies is scheduled on the event loop that owns the queues.
+                loop.call_soon_threadsafe(deliver_candles, closed_candles, subscribers)
+            except RuntimeError as e: # The event loop has been closed.
+                log.error("[MarketData] Could not deliver candles: %s", e)
+                return
+
+def deliver_candles(closed_candles: list, subscribers: dict):
+    """Puts each closed candle, in arrival order, on the queues of the strategies trading its symbol."""
+    for symbol, candle in closed_candles:
+        for candle_queue in subscribers.get(symbol, ()):
+            candle_queue.put_nowait(candle)
+
 # --- Strategy Runner ---
-async def strategy_runner(strategy, config, execution_handler, portfolio_manager, db_config, strategy_monitor):
+async def strategy_runner(strategy, config, execution_handler, portfolio_manager, db_config, strategy_monitor, candle_queue):
     """
     The main asynchronous task for running a single trading strategy.
 
     This function manages the lifecycle of one strategy, including:
-    - Pre-loading historical data.
-    - Establishing and maintaining a WebSocket connection for real-time data.
-    - Handling connection errors with exponential backoff.
+    - Pre-loading historical bars of the strategy's timeframe.
+    - Consuming closed 1-minute candles from its queue on the shared market data stream.
     - Passing incoming data to the appropriate handlers.
     """
     strategy_name = strategy.name
     asset = config['asset']
     timeframe = config.get('timeframe', '1h')
 
-    # This now returns raw 1-minute data
-    historical_1m_data = preload_historical_data(asset, timeframe, db_config)
-
-    # Determine the last processed timestamp for the STRATEGY'S timeframe
-    last_processed_ts = None
-    if not historical_1m_data.empty:
-        resample_freq = timeframe.replace('m', 'min').replace('h', 'H')
-        # Resample once just to get the last timestamp
-        resampler = historical_1m_data.resample(resample_freq)
-        if resampler.groups:
-            last_processed_ts = resampler.last().index[-1]
+    # The timeframe is parsed into a pandas offset once, here, so the per-candle
+    # path only works with the bar duration as an integer number of nanoseconds.
+    bar_offset = pd.tseries.frequencies.to_offset(timeframe_to_offset(timeframe))
+
+    # The history arrives already aggregated into bars of the strategy's timeframe.
+    # The database fetch is blocking, so it runs in the executor: this keeps the event
+    # loop free and lets the runners of all strategies preload concurrently.
+    loop = asyncio.get_running_loop()
+    historical_bars, last_preloaded_ns = await loop.run_in_executor(None, preload_historical_data, asset, timeframe, db_config)
+    max_bars = None if strategy.warmup_bars is None else max(MAX_LIVE_BARS, strategy.warmup_bars)
+    bars = CandleBuffer.from_frame(historical_bars, max_size=max_bars, dtype=BAR_DTYPE)
+
+    # The newest preloaded bar becomes the forming bar, which the incoming 1-minute
+    # candles keep updating, only if its period contains the current time. If the
+    # database is behind (e.g., the ingestor was down), that bar is already complete
+    # and stays with the completed bars, so no decision is made on it at the next candle.
+    current_bar = None
+    if len(bars) and time.time_ns() < bars.last_timestamp_ns + bar_offset.nanos:
+        current_bar = bars.pop()
     
     # This dictionary holds the dynamic state for this specific strategy instance.
     strategy_state = {
         'state': TradingState.SEARCHING,
-        'data': historical_1m_data, # This is now raw 1m data
-        'last_processed_timestamp': last_processed_ts, # Correctly initialized
-        'last_ws_message_time': time.time(),
-        'config': config,
-        'reconnect_attempts': 0
+        'bars': bars, # Completed bars of the strategy's timeframe in a columnar buffer
+        'current_bar': current_bar, # [bar_start_ns, Open, High, Low, Close, Volume] of the forming bar
+        # Open time of the newest 1-minute candle already included in the bars. Candles
+        # at or before it (e.g., stream candles that were also preloaded) are skipped,
+        # so that they are not folded into a bar twice.
+        'last_candle_ns': last_preloaded_ns,
+        'bar_duration_ns': bar_offset.nanos,
+        'asset': asset,
+        'config': config
     }
     log.info(f"[{strategy_name}] Initialized. State: {strategy_state['state']}.")
 
-    socket_url = f"wss://stream.binance.com:9443/ws/{asset.replace('-', '').lower()}@kline_1m"
+    # Monitoring reports are rendered by a separate task so that their file I/O
+    # never delays the next trading decision.
+    monitor_queue = asyncio.Queue()
+    monitor_task = asyncio.create_task(monitor_consumer(monitor_queue, strategy_monitor))
 
-    ws = None
-    loop = asyncio.get_event_loop()
     try:
-        # This outer loop handles reconnection logic.
         while True:
+            candle = await candle_queue.get()
             try:
-                log.info(f"[{strategy_name}] Attempting to connect to websocket: {socket_url}")
-                ws = websocket.WebSocketApp(
-                    socket_url,
-                    on_open=lambda ws: on_open(ws, strategy_name, strategy_state),
-                    on_message=lambda ws, msg: on_message(ws, msg, strategy, strategy_state, portfolio_manager, execution_handler, strategy_monitor),
-                    on_error=lambda ws, err: on_error(ws, err, strategy_name),
-                    on_close=lambda ws, code, msg: on_close(ws, code, msg, strategy_name)
+                # Bar processing can place orders through blocking HTTP calls, so it runs in
+                # the executor to keep the event loop free for the stream and other strategies.
+                report_args = await loop.run_in_executor(
+                    None, handle_closed_candle,
+                    candle, strategy, strategy_state, portfolio_manager, execution_handler, strategy_monitor
                 )
-                # The `run_forever()` method is a blocking call. To prevent it from
-                # halting the entire asyncio event loop (which would stop all other
-                # strategies), we run it in a separate thread managed by the event loop's executor.
-                await loop.run_in_executor(None, ws.run_forever)
-                
-                # If `run_forever` exits (e.g., due to a server disconnect), we raise an
-                # exception to trigger the reconnect logic below.
-                raise ConnectionAbortedError("Websocket connection closed unexpectedly. Reconnecting...")
-
+                if report_args is not None:
+                    monitor_queue.put_nowait(report_args)
             except Exception as e:
-                # Exponential backoff for reconnection attempts to avoid spamming the server.
-                strategy_state['reconnect_attempts'] += 1
-                base_delay = 5; max_delay = 60
-                backoff_time = min(max_delay, base_delay * (2 ** strategy_state['reconnect_attempts']))
-                sleep_duration = backoff_time + random.uniform(0, 1)
-                log.error(f"[{strategy_name}] Websocket connection error: {e}. Reconnecting in {sleep_duration:.2f} seconds... (Attempt {strategy_state['reconnect_attempts']})")
-                time.sleep(sleep_duration)
-    except KeyboardInterrupt:
-        log.info(f"\n[{strategy_name}] Shutdown signal received. Exiting strategy runner.")
+                log.error("[%s] Error processing candle: %s", strategy_name, e, exc_info=True)
     finally:
-        if ws and ws.sock and ws.sock.connected:
-            ws.close()
+        monitor_task.cancel()
         log.info(f"[{strategy_name}] Strategy runner has terminated.")
 
-def on_open(ws, strategy_name: str, strategy_state: dict):
-    """Callback executed when the WebSocket connection is successfully opened."""
-    if strategy_state['reconnect_attempts'] > 0:
-        log.info(f"[{strategy_name}] ✅ Successfully reconnected to websocket.")
-        strategy_state['reconnect_attempts'] = 0
-    else:
-        log.info(f"[{strategy_name}] Websocket connection opened.")
-
-def on_error(ws, error, strategy_name):
-    """Callback executed when a WebSocket error occurs."""
-    log.error(f"[{strategy_name}] Websocket error: {error}")
-
-def on_close(ws, close_status_code, close_msg, strategy_name):
-    """Callback executed when the WebSocket connection is closed."""
-    log.warning(f"[{strategy_name}] Websocket connection closed. Code: {close_status_code}, Msg: {close_msg}")
-
-def on_message(ws, message, strategy, strategy_state, portfolio_manager, execution_handler, strategy_monitor):
+async def monitor_consumer(monitor_queue: asyncio.Queue, strategy_monitor: StrategyMonitor):
     """
-    Callback for processing incoming WebSocket messages.
-    This is the entry point for all real-time market data.
+    Generates a strategy's monitoring report from the snapshots queued by its runner.
+    Each report overwrites the previous one, so if several snapshots are waiting
+    only the most recent one is rendered.
     """
-    try:
-        strategy_state['last_ws_message_time'] = time.time()
-        json_message = json.loads(message)
-        candle = json_message.get('k')
-        # We only care about candles that have officially closed.
-        if candle and candle['x']:
-            handle_closed_candle(candle, strategy, strategy_state, portfolio_manager, execution_handler, strategy_monitor)
-    except Exception as e:
-        log.error(f"[{strategy.name}] Error processing message: {e}", exc_info=True)
+    loop = asyncio.get_running_loop()
+    while True:
+        report_args = await monitor_queue.get()
+        while not monitor_queue.empty():
+            report_args = monitor_queue.get_nowait()
+        try:
+            await loop.run_in_executor(None, strategy_monitor.generate_report, *report_args)
+        except Exception as e:
+            log.error("[%s] Error generating monitor report: %s", strategy_monitor.strategy.name, e, exc_info=True)
 
 def handle_closed_candle(candle, strategy, strategy_state, portfolio_manager, execution_handler, strategy_monitor):
     """
     Processes a single closed 1-minute candle from the WebSocket stream.
-    It appends the new data and checks if a new bar for the strategy's timeframe has formed.
+
+    The candle is folded into the forming bar of the strategy's timeframe in O(1)
+    (High=max, Low=min, Close=last, Volume=sum). When that bar completes, it is
+    appended to the completed bars and `process_new_bar` makes a decision.
+
+    Returns:
+        tuple | None: The monitoring snapshot from `process_new_bar` if a bar
+                      was completed, otherwise None.
     """
-    timeframe = strategy_state['config']['timeframe']
-    
-    timestamp = pd.to_datetime(candle['t'], unit='ms', utc=True)
-    
-    # Create a new DataFrame row for the incoming 1-minute candle.
-    new_row = {'Open': float(candle['o']), 'High': float(candle['h']), 'Low': float(candle['l']), 'Close': float(candle['c']), 'Volume': float(candle['v'])}
-    new_df = pd.DataFrame([new_row], index=[timestamp])
-    # Append it to the strategy's historical data.
-    strategy_state['data'] = pd.concat([strategy_state['data'], new_df])
-
-    # Resample the accumulated 1-minute data into the strategy's required timeframe (e.g., '15m', '1h').
-    resample_freq = timeframe.replace('m', 'min').replace('h', 'H')
-    resampler = strategy_state['data'].resample(resample_freq)
-    if not resampler.groups: return
-
-    # Check if the latest resampled bar is newer than the last one we processed.
-    last_resampled_ts = resampler.last().index[-1]
-    if strategy_state['last_processed_timestamp'] is None or last_resampled_ts > strategy_state['last_processed_timestamp']:
-        # A new bar has formed, time to make a decision.
-        process_new_bar(strategy, strategy_state, resampler, float(candle['c']), portfolio_manager, execution_handler, strategy_monitor)
-        strategy_state['last_processed_timestamp'] = last_resampled_ts
-
-def process_new_bar(strategy, strategy_state, resampler, current_price, portfolio_manager, execution_handler, strategy_monitor):
+    timestamp_ns = int(candle['t']) * 1_000_000
+    candle_close_ns = timestamp_ns + ONE_MINUTE_NS
+    close_price = float(candle['c'])
+    high_price = float(candle['h'])
+    low_price = float(candle['l'])
+    volume = float(candle['v'])
+
+    # The bar (e.g., '15m', '1h') that this candle belongs to starts at its timestamp
+    # floored to the bar duration, which aligns bars to the Unix epoch like the preload.
+    bar_duration_ns = strategy_state['bar_duration_ns']
+    bar_start_ns = timestamp_ns - timestamp_ns % bar_duration_ns
+
+    last_candle_ns = strategy_state['last_candle_ns']
+    if last_candle_ns is not None and timestamp_ns <= last_candle_ns:
+        log.debug("[%s] Skipping candle at %s, which is already included in the bars.", strategy.name, pd.Timestamp(timestamp_ns, tz='UTC'))
+        return None
+
+    report_args = None
+    current_bar = strategy_state['current_bar']
+    # A candle may update the forming bar or open a new one, but never reopen a completed bar.
+    if current_bar is not None:
+        out_of_order = bar_start_ns < current_bar[0]
+    else:
+        last_bar_start_ns = strategy_state['bars'].last_timestamp_ns
+        out_of_order = last_bar_start_ns is not None and bar_start_ns <= last_bar_start_ns
+    if out_of_order:
+        log.warning("[%s] Ignoring out-of-order candle at %s.", strategy.name, pd.Timestamp(timestamp_ns, tz='UTC'))
+        return None
+    strategy_state['last_candle_ns'] = timestamp_ns
+
+    if current_bar is not None:
+        if bar_start_ns > current_bar[0]:
+            # The candle opens a new bar, so the forming one is complete even though
+            # its final minute was never received (e.g., during a reconnect).
+            report_args = complete_current_bar(strategy, strategy_state, close_price, candle_close_ns, portfolio_manager, execution_handler, strategy_monitor)
+            current_bar = None
+
+    if current_bar is None:
+        strategy_state['current_bar'] = [bar_start_ns, float(candle['o']), high_price, low_price, close_price, volume]
+    else:
+        current_bar[2] = max(current_bar[2], high_price)
+        current_bar[3] = min(current_bar[3], low_price)
+        current_bar[4] = close_price
+        current_bar[5] += volume
+
+    # The last minute of the bar has closed, so the bar is complete.
+    if candle_close_ns >= bar_start_ns + bar_duration_ns:
+        report_args = complete_current_bar(strategy, strategy_state, close_price, candle_close_ns, portfolio_manager, execution_handler, strategy_monitor)
+    return report_args
+
+def complete_current_bar(strategy, strategy_state, current_price, decision_time_ns, portfolio_manager, execution_handler, strategy_monitor):
+    """Moves the forming bar into the completed bars and runs the decision logic on them."""
+    strategy_state['bars'].append(*strategy_state['current_bar'])
+    strategy_state['current_bar'] = None
+    decision_time = pd.Timestamp(decision_time_ns, tz='UTC')
+    return process_new_bar(strategy, strategy_state, current_price, decision_time, portfolio_manager, execution_handler, strategy_monitor)
+
+def process_new_bar(strategy, strategy_state, current_price, decision_time, portfolio_manager, execution_handler, strategy_monitor):
     """
     The core decision-making function. Called when a new bar for the strategy's
     timeframe is completed.
 
     It performs these steps:
-    1. Aggregates the 1-minute data into the final resampled DataFrame.
+    1. Materializes the completed bars as a DataFrame.
     2. Calls the strategy's `generate_signals` method.
     3. Retrieves the strategy's dedicated sub-portfolio.
     4. Checks the latest signal and current position state to decide on an action (BUY, SELL, HOLD).
-    5. Executes orders through the execution handler.
-    6. Updates the monitoring report.
+    5. Executes orders through the execution handler. Fills are time-stamped with
+       `decision_time`, the close time of the candle that completed the bar.
+    6. Returns a snapshot for the monitoring report, which is generated by
+       `monitor_consumer` so that its file I/O stays off the decision path.
+       The sub-portfolio's cash, position and equity are copied into it, so the
+       report shows the values of this decision and never writes to the sub-portfolio.
+
+    Returns:
+        tuple | None: (strategy_state, latest_signal, current_price, price_data, portfolio_snapshot),
+                      the arguments for `StrategyMonitor.generate_report`.
     """
-    asset = strategy_state['config']['asset']
+    # Values used throughout the decision are read once into locals.
+    strategy_name = strategy.name
+    asset = strategy_state['asset']
     
-    # 1. Aggregate the 1-minute data into the final OHLCV bars for the strategy's timeframe.
-    agg_rules = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
-    resampled_df = resampler.agg(agg_rules).dropna()
+    # 1. Materialize the completed bars of the strategy's timeframe. They are kept
+    # up to date incrementally, so no resampling of the history is needed.
+    resampled_df = strategy_state['bars'].to_frame()
     
-    # 2. Generate signals using the strategy's logic.
-    signals_df = strategy.generate_signals(resampled_df.copy())
+    # 2. Generate signals using the strategy's logic, on the most recent bars its indicators need.
+    warmup_bars = strategy.warmup_bars
+    signal_input = resampled_df if warmup_bars is None else resampled_df.iloc[-warmup_bars:]
+    # Strategies never modify their input, so the bars are passed without a copy.
+    signals_df = strategy.generate_signals(signal_input)
     latest_signal = signals_df['signal'].iloc[-1]
     
     # 3. Get the sub-portfolio dedicated to this specific strategy.
-    strategy_portfolio = portfolio_manager.get_strategy_portfolio(strategy.name)
+    strategy_portfolio = portfolio_manager.get_strategy_portfolio(strategy_name)
     if not strategy_portfolio:
-        log.error(f"[{strategy.name}] Could not find its sub-portfolio. Skipping bar processing.")
-        return
+        log.error("[%s] Could not find its sub-portfolio. Skipping bar processing.", strategy_name)
+        return None
 
     # Update the sub-portfolio's market value before making decisions
     strategy_portfolio.update_market_value(current_price)
@@ -299,7 +519,7 @@ def process_new_bar(strategy, strategy_state, resampler, current_price, portfoli
 
     # 4. Decision logic based on signal and current state.
     if current_state == TradingState.SEARCHING and latest_signal == 1:
-        log.info(f"[{strategy.name}] ---> Decision: BUY SIGNAL DETECTED <---")
+        log.info("[%s] ---> Decision: BUY SIGNAL DETECTED <---", strategy_name)
         # Position size is calculated based on the strategy's *own* allocated equity, not the master account.
         risk_amount = strategy_portfolio.calculate_position_size()
         if risk_amount > 0:
@@ -314,8 +534,8 @@ def process_new_bar(strategy, strategy_state, resampler, current_price, portfoli
                 slippage_pct = ((fill_price - current_price) / current_price) * 100 if current_price > 0 else 0.0
 
                 portfolio_manager.on_fill(
-                    strategy_name=strategy.name,
-                    timestamp=datetime.now(timezone.utc), 
+                    strategy_name=strategy_name,
+                    timestamp=decision_time,
                     asset=asset, 
                     quantity=fill_data['filled_quantity'], 
                     fill_price=fill_price, 
@@ -325,25 +545,25 @@ def process_new_bar(strategy, strategy_state, resampler, current_price, portfoli
                 )
                 strategy_state['state'] = TradingState.IN_POSITION
             else:
-                log.error(f"[{strategy.name}] BUY order failed or was not confirmed! Reason: {order_response.get('error', 'Unknown')}")
+                log.error("[%s] BUY order failed or was not confirmed! Reason: %s", strategy_name, order_response.get('error', 'Unknown'))
 
     elif current_state == TradingState.IN_POSITION and latest_signal == -1:
-        log.info(f"[{strategy.name}] ---> Decision: SELL SIGNAL DETECTED <---")
+        log.info("[%s] ---> Decision: SELL SIGNAL DETECTED <---", strategy_name)
         # When selling, we sell the entire quantity held by this specific strategy's sub-portfolio.
         quantity_to_sell = strategy_portfolio.positions.get(asset, 0)
         if quantity_to_sell > 0:
             order_response = execution_handler.place_order(asset, 'MARKET', quantity_to_sell, 'SELL', current_price)
             if order_response and order_response.get('success'):
                 fill_data = order_response['data']
-                log.info(f"[{strategy.name}] SELL order fill confirmed by execution handler.")
+                log.info("[%s] SELL order fill confirmed by execution handler.", strategy_name)
 
                 # --- NEW: Calculate slippage ---
                 fill_price = fill_data['fill_price']
                 slippage_pct = ((current_price - fill_price) / current_price) * 100 if current_price > 0 else 0.0
 
                 portfolio_manager.on_fill(
-                    strategy_name=strategy.name,
-                    timestamp=datetime.now(timezone.utc),
+                    strategy_name=strategy_name,
+                    timestamp=decision_time,
                     asset=asset,
                     quantity=fill_data['filled_quantity'],
                     fill_price=fill_price,
@@ -353,29 +573,41 @@ def process_new_bar(strategy, strategy_state, resampler, current_price, portfoli
                 )
                 strategy_state['state'] = TradingState.SEARCHING
             else:
-                log.error(f"[{strategy.name}] SELL order failed or was not confirmed! Reason: {order_response.get('error', 'Unknown')}")
+                log.error("[%s] SELL order failed or was not confirmed! Reason: %s", strategy_name, order_response.get('error', 'Unknown'))
     else:
-        log.info(f"[{strategy.name}] ---> Decision: No action. Holding state: {current_state}")
-
-    # 5. Generate the updated HTML and JSON monitoring files for this strategy.
-    monitor_price_data = resampled_df[resampled_df.index >= strategy_monitor.start_time]
-    strategy_monitor.generate_report(
-        strategy_state=strategy_state['state'],
-        latest_signal=int(latest_signal),
-        current_price=current_price,
-        price_data=monitor_price_data
-    )
+        log.info("[%s] ---> Decision: No action. Holding state: %s", strategy_name, current_state)
+
+    # 5. Snapshot the data for the HTML and JSON monitoring files of this strategy.
+    # The index is sorted, so a binary search finds where the monitoring window starts
+    # and `.iloc` slices the tail as a view instead of building a boolean mask.
+    start_pos = resampled_df.index.searchsorted(strategy_monitor.start_time, side='left')
+    monitor_price_data = resampled_df.iloc[start_pos:]
+    return (strategy_state['state'], int(latest_signal), current_price, monitor_price_data, strategy_portfolio.get_snapshot())
 
 
 # --- Main Application ---
-async def main():
-    """The main entry point for the trading application."""
+async def main(strategy_to_run: str = None):
+    """
+    The main entry point for the trading application.
+
+    Args:
+        strategy_to_run (str, optional): Name of a single strategy from the config
+                                         to run. Defaults to None (run all strategies).
+    """
     log.info("--- Starting Multi-Strategy Live Trading Engine ---")
     
     # --- 1. Configuration Loading & Validation ---
-    validate_total_cash_allocation(CONFIG_PATH)
-
-    all_strategy_configs, system_config = load_all_strategies_from_config(CONFIG_PATH)
+    # The config file is parsed once and the resulting dict is shared by all helpers.
+    full_config = load_config(CONFIG_PATH)
+    validate_total_cash_allocation(full_config)
+
+    all_strategy_configs, system_config = load_all_strategies_from_config(full_config)
+    if strategy_to_run:
+        all_strategy_configs = [sc for sc in all_strategy_configs if sc.get('name') == strategy_to_run]
+        if not all_strategy_configs:
+            log.error(f"Strategy '{strategy_to_run}' not found in config. Exiting.")
+            return
+        log.info(f"Running only strategy '{strategy_to_run}'.")
     if not all_strategy_configs:
         log.error("No strategies loaded from config. Exiting.")
         return
@@ -430,8 +662,18 @@ async def main():
     # --- 3. Initialize and Register All Strategies ---
     strategy_tasks = []
     db_config = system_config.get('database')
+    # Maps each stream symbol to the candle queues of the strategies trading it.
+    subscribers = {}
 
     for config in all_strategy_configs:
+        # Reject an unsupported timeframe here, with a clear message, rather than
+        # when its runner starts.
+        try:
+            timeframe_to_offset(config.get('timeframe', '1h'))
+        except ValueError as e:
+            log.error(f"Skipping strategy '{config.get('name', 'N/A')}': {e}")
+            continue
+
         # Load the strategy's class from its module.
         strategy_instance = load_strategy_instance(config)
         if not strategy_instance: continue
@@ -452,17 +694,21 @@ async def main():
             timeframe=config.get('timeframe')
         )
 
+        # Subscribe the strategy to its asset's candles on the shared market data stream.
+        candle_queue = asyncio.Queue()
+        subscribers.setdefault(config['asset'].replace('-', '').lower(), []).append(candle_queue)
+
         # Create an asyncio task for each strategy. This is what allows them to run concurrently.
-        task = asyncio.create_task(strategy_runner(strategy_instance, config, execution_handler, portfolio_manager, db_config, strategy_monitor))
+        task = asyncio.create_task(strategy_runner(strategy_instance, config, execution_handler, portfolio_manager, db_config, strategy_monitor, candle_queue))
         strategy_tasks.append(task)
     
-    # --- 4. Start Background Monitoring Threads ---
-    # These threads run alongside the main async loop for periodic tasks.
+    # --- 4. Start Background Reconciliation and Monitoring ---
+    # Reconciliation runs as a task on the event loop; the monitoring threads run
+    # alongside it for periodic file generation.
     recon_interval = system_config.get('reconciliation_interval_seconds', 60)
     log.info(f"Portfolio reconciliation interval set to {recon_interval} seconds.")
-    recon_thread = threading.Thread(target=reconciliation_loop, args=(portfolio_manager, execution_handler, recon_interval), daemon=True)
-    recon_thread.start()
-    log.info("Portfolio reconciliation thread started.")
+    recon_task = asyncio.create_task(reconciliation_loop(portfolio_manager, execution_handler, recon_interval))
+    log.info("Portfolio reconciliation task started.")
 
     master_monitor_interval = system_config.get('master_monitor_interval_seconds', 60)
     master_monitor_thread = threading.Thread(target=master_monitor_loop, args=(portfolio_manager, master_monitor_interval), daemon=True)
@@ -476,15 +722,16 @@ async def main():
 
     # --- 5. Run All Strategy Tasks Concurrently ---
     if strategy_tasks:
-        log.info(f"--- Starting {len(strategy_tasks)} strategies concurrently ---")
-        await asyncio.gather(*strategy_tasks)
+        log.info(f"--- Starting {len(strategy_tasks)} strategies concurrently on {len(subscribers)} shared market data stream(s) ---")
+        market_data_task = asyncio.create_task(market_data_stream(subscribers))
+        await asyncio.gather(market_data_task, recon_task, *strategy_tasks)
     else:
+        recon_task.cancel()
         log.warning("No strategies were successfully started.")
 
-def load_all_strategies_from_config(config_path: str) -> tuple:
-    """Loads the 'strategies' and 'system' sections from the main YAML config file."""
+def load_all_strategies_from_config(config: dict) -> tuple:
+    """Returns the 'strategies' and 'system' sections of the parsed config."""
     log.info("Loading all strategy configurations...")
-    with open(config_path, 'r') as f: config = yaml.safe_load(f)
     return config.get('strategies', []), config.get('system', {})
 
 def load_strategy_instance(config: dict):
@@ -503,33 +750,66 @@ def load_strategy_instance(config: dict):
         log.error(f"Failed to load strategy instance for '{config.get('name', 'N/A')}': {e}", exc_info=True)
         return None
 
-def preload_historical_data(asset: str, timeframe: str, db_config: dict):
+def preload_historical_data(asset: str, timeframe: str, db_config: dict) -> tuple:
     """
-    Fetches the initial chunk of historical 1-minute data needed to warm up the strategy's indicators.
+    Fetches the initial chunk of historical bars of the strategy's timeframe needed
+    to warm up its indicators. The 1-minute candles are aggregated by the database.
+
+    The history ends exactly at the newest 1-minute candle stored when the preload
+    starts, so the caller knows which stream candles the bars already include.
+
+    Returns:
+        tuple: (bars DataFrame, open time of the newest included 1-minute candle in
+               UTC epoch nanoseconds, or None if no history was loaded).
     """
-    log.info(f"Pre-loading historical 1-minute data for {asset}...")
+    log.info(f"Pre-loading historical {timeframe} data for {asset}...")
+    empty_bars = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
     try:
-        # Fetch the last 30 days of 1-minute data to ensure we have enough to
-        # calculate indicators even for long lookback periods (e.g., 200-period MA on a 1h chart).
-        end_dt = datetime.utcnow()
+        conn = db_utils.get_pooled_connection(db_config)
+        if not conn:
+            return empty_bars, None
+        try:
+            latest_candle = db_utils.get_latest_timestamp(conn, f"{asset.replace('-', '').lower()}_1m_candles")
+        finally:
+            db_utils.release_connection(conn)
+        if latest_candle is None:
+            log.warning(f"No historical data found for {asset}. Starting with an empty DataFrame.")
+            return empty_bars, None
+
+        # Fetch the last 30 days of data to ensure we have enough to calculate
+        # indicators even for long lookback periods (e.g., 200-period MA on a 1h chart).
+        # The end is exclusive, so the newest candle read above is the last one included.
+        end_dt = latest_candle + timedelta(minutes=1)
         start_dt = end_dt - timedelta(days=30)
-        df_1m = db_utils.fetch_candles_for_range(db_config, asset, start_dt, end_dt)
+        if timeframe == '1m':
+            df_bars = db_utils.fetch_candles_for_range(db_config, asset, start_dt, end_dt)
+        else:
+            df_bars = db_utils.fetch_resampled_candles(db_config, asset, start_dt, end_dt, timeframe)
 
-        if df_1m is None or df_1m.empty:
+        if df_bars is None or df_bars.empty:
             log.warning(f"No historical data found for {asset} in the last 30 days. Starting with an empty DataFrame.")
-            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+            return empty_bars, None
 
         # Rename columns to the standard format used by the strategies
-        df_1m.rename(columns={'open_price': 'Open', 'high_price': 'High', 'low_price': 'Low', 'close_price': 'Close', 'volume': 'Volume'}, inplace=True)
-        log.info(f"Successfully pre-loaded {len(df_1m)} 1-minute bars for {asset}.")
-        return df_1m
+        df_bars.rename(columns={'open_price': 'Open', 'high_price': 'High', 'low_price': 'Low', 'close_price': 'Close', 'volume': 'Volume'}, inplace=True)
+        log.info(f"Successfully pre-loaded {len(df_bars)} {timeframe} bars for {asset}, up to the candle at {latest_candle}.")
+        return df_bars, pd.Timestamp(latest_candle).value
     except Exception as e:
         log.error(f"Failed to preload data for {asset}: {e}", exc_info=True)
-        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+        return empty_bars, None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live/Paper Trading Engine for the Trading System.")
+    parser.add_argument(
+        '--strategy',
+        type=str,
+        default=None,
+        help="The name of a single strategy from config.yaml to run. Defaults to running all strategies."
+    )
+    args = parser.parse_args()
+
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.strategy))
     except KeyboardInterrupt:
         log.info("\n--- Shutdown signal received ---")
         log.info("--- Engine shutting down. ---")
@@ -9,6 +9,7 @@ specified symbol.
 
 import os
 import sys
+import numpy as np
 import pandas as pd
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
@@ -52,16 +53,15 @@ def check_binance_account():
         log.info("\n--- Account Balances ---")
         account_info = client.get_account()
         
-        balances = pd.DataFrame(account_info['balances'])
-        balances['free'] = pd.to_numeric(balances['free'])
-        balances['locked'] = pd.to_numeric(balances['locked'])
+        # Filter for assets with a non-zero balance before building a DataFrame,
+        # as the vast majority of the listed assets hold nothing.
+        non_zero = [b for b in account_info['balances'] if float(b['free']) > 0.00001 or float(b['locked']) > 0.00001]
         
-        # Filter for assets with a non-zero balance
-        positions = balances[(balances['free'] > 0.00001) | (balances['locked'] > 0.00001)]
-        
-        if positions.empty:
+        if not non_zero:
             log.info("No assets found with a balance.")
         else:
+            positions = pd.DataFrame(non_zero)
+            positions[['free', 'locked']] = positions[['free', 'locked']].astype(float)
             print(positions.to_string(index=False))
 
         # 4. Fetch and display all currently open orders.
@@ -83,7 +83,7 @@ def check_binance_account():
             trades_df['time'] = pd.to_datetime(trades_df['time'], unit='ms')
             
             # --- FIX: Create 'side' column from 'isBuyer' boolean ---
-            trades_df['side'] = trades_df['isBuyer'].apply(lambda x: 'BUY' if x else 'SELL')
+            trades_df['side'] = np.where(trades_df['isBuyer'].to_numpy(dtype=bool), 'BUY', 'SELL')
             
             print(trades_df[['time', 'symbol', 'side', 'price', 'qty', 'commission']].to_string(index=False))
 
@@ -1,4 +1,5 @@
 import logging
+import re
 import sys
 
 # Configure the logger once when the module is imported
@@ -14,4 +15,40 @@ logging.basicConfig(
 )
 
 # Create a logger instance that other modules can import and use
-log = logging.getLogger(__name__)
\ No newline at end of file
+log = logging.getLogger(__name__)
+
+# Timeout, in seconds, for every HTTP request to the Binance REST API. Without one, a
+# stalled socket blocks its caller (or a thread pool worker) forever.
+REQUEST_TIMEOUT_SECONDS = 10
+
+# Strategy timeframes, as written in config.yaml, mapped to pandas offset aliases.
+# A lookup table avoids rebuilding the alias with string replacements, and uses the
+# lowercase 'h' alias, as the uppercase 'H' is deprecated in pandas 2.x. It lists the
+# Binance kline intervals of fixed length; a week is '7D' rather than 'W', which is
+# anchored to a weekday and has no fixed duration. Other values are parsed by
+# `timeframe_to_offset`.
+TIMEFRAME_MAP = {
+    '1m': '1min', '3m': '3min', '5m': '5min', '15m': '15min', '30m': '30min',
+    '1h': '1h', '2h': '2h', '4h': '4h', '6h': '6h', '8h': '8h', '12h': '12h',
+    '1d': '1D', '3d': '3D', '1w': '7D'
+}
+TIMEFRAME_UNITS = {'m': ('min', 1), 'h': ('h', 1), 'd': ('D', 1), 'w': ('D', 7)}
+
+def timeframe_to_offset(timeframe: str) -> str:
+    """
+    Converts a strategy timeframe (e.g., '15m', '4h', '1d') to a pandas offset alias.
+
+    Timeframes missing from TIMEFRAME_MAP are parsed as a count followed by one of
+    the units m, h, d or w (e.g., '10m' -> '10min', '2w' -> '14D').
+
+    Raises:
+        ValueError: If the timeframe is not in that format.
+    """
+    offset = TIMEFRAME_MAP.get(timeframe)
+    if offset is not None:
+        return offset
+    match = re.fullmatch(r'(\d+)([mhdw])', str(timeframe))
+    if not match or int(match[1]) == 0:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'. Use a count followed by m, h, d or w (e.g., '15m', '4h', '1d', '1w').")
+    alias, multiplier = TIMEFRAME_UNITS[match[2]]
+    return f"{int(match[1]) * multiplier}{alias}"
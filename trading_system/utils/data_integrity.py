@@ -1,8 +1,12 @@
 import sys
 import os
+import argparse
 import yaml
+import threading
 import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timezone, timedelta
 
 # Add project root to Python's path
@@ -10,10 +14,37 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, PROJECT_ROOT)
 
 from trading_system.utils import db_utils
-from trading_system.utils.common import log
+from trading_system.utils.common import log, REQUEST_TIMEOUT_SECONDS
 from trading_system.data_ingestion import BINANCE_API_URL
 
 CONFIG_PATH = os.path.join(PROJECT_ROOT, 'trading_system', 'config', 'config.yaml')
+# Days filled concurrently. Each day costs two kline requests (weight 2 each),
+# which keeps a full pool far below Binance's 1200 weight/min limit.
+MAX_FILL_WORKERS = 8
+# Assets checked concurrently. Their fills share the MAX_FILL_WORKERS slots below, so
+# the request rate and the number of pooled DB connections stay bounded.
+MAX_ASSET_WORKERS = 4
+_FILL_SLOTS = threading.BoundedSemaphore(MAX_FILL_WORKERS)
+
+def _create_http_session() -> requests.Session:
+    """
+    Creates the HTTP session shared by all Binance REST calls of this module.
+    Its keep-alive connection pool reuses the TCP+TLS connection across requests,
+    and transient errors (rate limiting, 5xx) are retried with a backoff.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET'])
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+_SESSION = _create_http_session()
+
+def _fetch_klines(params: dict) -> list:
+    """Fetches one batch of klines from the Binance REST API, raising on HTTP errors."""
+    response = _SESSION.get(BINANCE_API_URL, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.json()
 
 def fetch_and_fill_day(conn, asset: str, interval: str, day: datetime.date):
     """
@@ -42,16 +73,12 @@ def fetch_and_fill_day(conn, asset: str, interval: str, day: datetime.date):
     }
 
     try:
-        log.info(f"⬇️  Fetching first batch of records...")
-        response1 = requests.get(BINANCE_API_URL, params=params1)
-        response1.raise_for_status()
-        all_day_data.extend(response1.json())
-        time.sleep(0.5) # Pause between requests
-
-        log.info(f"⬇️  Fetching second batch of records...")
-        response2 = requests.get(BINANCE_API_URL, params=params2)
-        response2.raise_for_status()
-        all_day_data.extend(response2.json())
+        # The two batches are independent, so they are fetched concurrently over the
+        # shared session's connection pool and appended in chronological order.
+        log.info(f"⬇️  Fetching both batches of records...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for batch in executor.map(_fetch_klines, (params1, params2)):
+                all_day_data.extend(batch)
         
         if all_day_data:
             # --- THIS IS THE CORRECTED LINE ---
@@ -64,47 +91,78 @@ def fetch_and_fill_day(conn, asset: str, interval: str, day: datetime.date):
     except requests.exceptions.RequestException as e:
         log.error(f"Error fetching full day data for {day}: {e}")
 
-def find_gaps_by_daily_count(db_config: dict, asset: str, interval: str):
+def _fill_day(db_config: dict, asset: str, interval: str, day: datetime.date):
+    """
+    Fills one day on its own pooled database connection, so that days can be filled in parallel.
+    At most MAX_FILL_WORKERS days are filled at once across all assets.
+    """
+    with _FILL_SLOTS:
+        conn = db_utils.get_pooled_connection(db_config)
+        if conn is None: return
+        try:
+            fetch_and_fill_day(conn, asset, interval, day)
+        except Exception as e:
+            log.error(f"Error filling data for {asset} on {day}: {e}", exc_info=True)
+        finally:
+            db_utils.release_connection(conn)
+
+def find_gaps_by_daily_count(db_config: dict, asset: str, interval: str, fill_gaps: bool = False, full_check: bool = False):
     """
-    Analyzes candle data by counting records per day and triggers a full-day
-    fetch for any days with missing records.
+    Analyzes candle data by counting records per day and, if `fill_gaps` is set,
+    triggers a full-day fetch for any days with missing records. The days are
+    filled in parallel by a bounded pool of worker threads.
+
+    Only the days after the last complete stretch found by the previous run are
+    counted, unless `full_check` is set. The first day that may still need work
+    (the earliest gap, or today) is saved for the next run.
     """
     log.info(f"--- Starting Daily Count Integrity Check for asset: {asset} ---")
     
     table_name = f"{asset.replace('-', '').lower()}_{interval}_candles"
     THEORETICAL_MAX_PER_DAY = 1440
-    
-    conn = db_utils.get_db_connection(db_config)
-    if conn is None: return
 
-    try:
-        daily_counts = db_utils.get_daily_candle_counts(db_config, table_name)
-        if not daily_counts:
-            log.warning(f"No daily data found for {asset}. Cannot check for gaps.")
-            return
+    since = None if full_check else db_utils.get_last_checked_day(db_config, table_name)
+    if since:
+        log.info(f"Resuming from {since}; earlier days were complete at the last check.")
+    incomplete_days = db_utils.get_gap_days(db_config, table_name, THEORETICAL_MAX_PER_DAY, since=since)
+    if incomplete_days is None:
+        log.warning(f"Could not check {asset} for gaps.")
+        return
 
-        gaps_found = False
-        for day, count in daily_counts:
-            # For the current day, it's normal to have less than 1440 records.
-            if day == datetime.now(timezone.utc).date():
-                continue
+    gap_days = []
+    for day, count in incomplete_days:
+        missing_count = THEORETICAL_MAX_PER_DAY - count
+        log.warning(f"  -> DATA GAP DETECTED on {day}: Found {count}/{THEORETICAL_MAX_PER_DAY} records. ({missing_count} missing)")
+        gap_days.append(day)
 
-            if count < THEORETICAL_MAX_PER_DAY:
-                gaps_found = True
-                missing_count = THEORETICAL_MAX_PER_DAY - count
-                log.warning(f"  -> DATA GAP DETECTED on {day}: Found {count}/{THEORETICAL_MAX_PER_DAY} records. ({missing_count} missing)")
-                # Call the new function to fetch and fill the entire day
-                #fetch_and_fill_day(conn, asset, interval, day)
+    # Gap days are re-checked next time, even when filled now, in case a fill failed.
+    db_utils.set_last_checked_day(db_config, table_name, gap_days[0] if gap_days else datetime.now(timezone.utc).date())
 
-        if not gaps_found:
-            log.info(f"✅ No days with missing records found for {asset}.")
+    if not gap_days:
+        log.info(f"✅ No days with missing records found for {asset}.")
+        return
 
-    finally:
-        if conn: conn.close()
+    if fill_gaps:
+        log.info(f"Filling {len(gap_days)} day(s) with missing records for {asset}...")
+        with ThreadPoolExecutor(max_workers=MAX_FILL_WORKERS) as executor:
+            list(executor.map(lambda day: _fill_day(db_config, asset, interval, day), gap_days))
 
 
 def main():
     """Main function to load config and run the gap-finding process."""
+    parser = argparse.ArgumentParser(description="Data Integrity Checker for the Trading System.")
+    parser.add_argument(
+        '--fill',
+        action='store_true',
+        help="Fetch and upsert the full data of every day with missing records. By default gaps are only reported."
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help="Ignore the progress saved by earlier runs and re-check every day in the tables."
+    )
+    args = parser.parse_args()
+
     try:
         with open(CONFIG_PATH, 'r') as f:
             config = yaml.safe_load(f)
@@ -115,9 +173,12 @@ def main():
     db_config = config['system']['database']
     ingestion_config = config['data_ingestion']
     
-    for asset in ingestion_config['assets_to_track']:
-        find_gaps_by_daily_count(db_config, asset, ingestion_config['base_interval'])
-        log.info("-" * 50)
+    # Each asset is dominated by database and HTTP round trips, so the assets are
+    # checked concurrently rather than one after another.
+    interval = ingestion_config['base_interval']
+    with ThreadPoolExecutor(max_workers=MAX_ASSET_WORKERS) as executor:
+        list(executor.map(lambda asset: find_gaps_by_daily_count(db_config, asset, interval, fill_gaps=args.fill, full_check=args.full), ingestion_config['assets_to_track']))
+    log.info("-" * 50)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -10,19 +10,111 @@ the data ingestion engine, backtester, and live trader.
 """
 
 import os
+import io
+import time
+import csv
+import tempfile
+import itertools
+import threading
+from operator import itemgetter
+from urllib.parse import quote
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+import numpy as np
 import pandas as pd
 import psycopg2
+import psycopg2.pool
+import psycopg2.extensions
 from psycopg2 import extras
 from datetime import datetime, timezone
-from trading_system.utils.common import log
+from trading_system.utils.common import log, timeframe_to_offset
+
+# Column order of the candle tables, shared by the bulk writers.
+CANDLE_COLUMNS = (
+    'open_time, open_price, high_price, low_price, close_price, volume, close_time, '
+    'quote_asset_volume, number_of_trades, taker_buy_base_asset_volume, '
+    'taker_buy_quote_asset_volume, ignore'
+)
+
+# Decode NUMERIC results straight to float. Every consumer of the candle tables works
+# in floating point, so the default Decimal objects would only be converted again.
+DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values, 'DEC2FLOAT',
+    lambda value, curs: float(value) if value is not None else None
+)
+psycopg2.extensions.register_type(DEC2FLOAT)
+
+# Conflict clause shared by the upserts. The target table must be aliased as 't'.
+# Rows whose values did not change are skipped, so they produce no new row version.
+UPSERT_ON_CONFLICT = """
+    ON CONFLICT (open_time)
+    DO UPDATE SET
+        close_price = EXCLUDED.close_price, high_price = EXCLUDED.high_price,
+        low_price = EXCLUDED.low_price, volume = EXCLUDED.volume,
+        number_of_trades = EXCLUDED.number_of_trades
+    WHERE (t.close_price, t.high_price, t.low_price, t.volume, t.number_of_trades)
+        IS DISTINCT FROM (EXCLUDED.close_price, EXCLUDED.high_price, EXCLUDED.low_price, EXCLUDED.volume, EXCLUDED.number_of_trades)"""
+
+# Placeholders for one WebSocket candle in CANDLE_COLUMNS order. The open and close
+# times are sent as epoch seconds and converted by the server.
+REALTIME_ROW_TEMPLATE = 'to_timestamp(%s), %s, %s, %s, %s, %s, to_timestamp(%s), %s, %s, %s, %s, %s'
+# Arguments of the prepared real-time upsert, which applies the conversions itself.
+REALTIME_ROW_PLACEHOLDERS = ', '.join(['%s'] * 12)
+
+# Time span of each chunk when the candle tables are TimescaleDB hypertables.
+HYPERTABLE_CHUNK_INTERVAL = '7 days'
+
+# Batches larger than this are written through COPY. For smaller ones, creating the
+# temporary staging table costs more than the server saves by not parsing an INSERT.
+COPY_MIN_ROWS = 500
+
+# Batch writes (backfills and gap fills) are idempotent: if the server crashes before
+# their WAL reaches disk, re-running the job restores the rows. Their transactions
+# therefore commit without waiting for the WAL flush. SET LOCAL limits this to the
+# current transaction, so pooled connections and real-time writes keep full durability.
+BATCH_WRITE_SETTINGS = "SET LOCAL synchronous_commit = off;"
+
+# Dtypes of the candles returned by fetch_candles_for_range. 'close_price' stays float64
+# because returns and equity are compounded from it.
+CANDLE_DTYPES = {'open_price': 'float32', 'high_price': 'float32', 'low_price': 'float32', 'close_price': 'float64', 'volume': 'float32'}
+# In-memory size of the CSV exported by fetch_candles_for_range before it spills to disk.
+COPY_SPOOL_MAX_BYTES = 64 * 1024 * 1024
 
 # --- Connection ---
+
+class CandleDBConnection(psycopg2.extensions.connection):
+    """A psycopg2 connection that remembers the statements prepared on its session."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+# Connections are shared through a pool created on first use, so short queries
+# do not each pay for a new TCP connection and authentication round trip.
+POOL_MAX_CONNECTIONS = 16
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _connection_details(db_config: dict) -> dict:
+    """Builds psycopg2 connection arguments, preferring environment variables over the config."""
+    return {
+        'dbname': os.environ.get('DB_NAME', db_config.get('name')),
+        'user': os.environ.get('DB_USER', db_config.get('user')),
+        'password': os.environ.get('DB_PASSWORD', db_config.get('password')),
+        'host': os.environ.get('DB_HOST', db_config.get('host')),
+        'port': os.environ.get('DB_PORT', db_config.get('port')),
+        'connection_factory': CandleDBConnection
+    }
+
 def get_db_connection(db_config: dict):
     """
     Establishes and returns a connection to the PostgreSQL database.
     It prioritizes environment variables for connection details, falling back
     to the provided config dictionary. This is useful for Docker environments.
 
+    The connection is dedicated to the caller, who must close it. Use it for
+    connections held for a whole session or whose settings are changed (e.g.
+    autocommit); short-lived work should use `get_pooled_connection` instead.
+
     Args:
         db_config (dict): A dictionary containing database connection parameters
                           (name, user, password, host, port).
@@ -31,19 +123,68 @@ def get_db_connection(db_config: dict):
         psycopg2.connection: A database connection object, or None if connection fails.
     """
     try:
-        conn_details = {
-            'dbname': os.environ.get('DB_NAME', db_config.get('name')),
-            'user': os.environ.get('DB_USER', db_config.get('user')),
-            'password': os.environ.get('DB_PASSWORD', db_config.get('password')),
-            'host': os.environ.get('DB_HOST', db_config.get('host')),
-            'port': os.environ.get('DB_PORT', db_config.get('port'))
-        }
-        conn = psycopg2.connect(**conn_details)
+        conn = psycopg2.connect(**_connection_details(db_config))
         return conn
     except Exception as e:
         log.error(f"❌ Could not connect to the database: {e}")
         return None
 
+def get_pooled_connection(db_config: dict):
+    """
+    Borrows a connection from the module's connection pool, creating the pool on first use.
+    Connections obtained here must be handed back with `release_connection` instead of closed.
+
+    Args:
+        db_config (dict): Database connection configuration, used when the pool is created.
+
+    Returns:
+        psycopg2.connection: A database connection object, or None if none could be obtained.
+    """
+    global _POOL
+    try:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = psycopg2.pool.ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, **_connection_details(db_config))
+        return _POOL.getconn()
+    except Exception as e:
+        log.error(f"❌ Could not get a pooled database connection: {e}")
+        return None
+
+def release_connection(conn):
+    """Returns a connection obtained from `get_pooled_connection` to the pool."""
+    try:
+        _POOL.putconn(conn)
+    except Exception as e:
+        log.error(f"Error returning a connection to the pool: {e}")
+
+def get_db_uri(db_config: dict) -> str:
+    """
+    Builds a 'postgresql://' connection URI from the same settings as `get_db_connection`,
+    for libraries such as connectorx that take a single connection string.
+    """
+    details = _connection_details(db_config)
+    credentials = quote(str(details['user'] or ''), safe='')
+    if details['password']:
+        credentials += ':' + quote(str(details['password']), safe='')
+    port = f":{details['port']}" if details['port'] else ''
+    return f"postgresql://{credentials}@{details['host']}{port}/{details['dbname']}"
+
+# connectorx is an optional accelerator for the candle reader. None means "not
+# loaded yet", False means it is not installed and the COPY reader is used.
+_connectorx = None
+
+def _load_connectorx():
+    """Lazily imports connectorx, returning None if it is not installed."""
+    global _connectorx
+    if _connectorx is None:
+        try:
+            import connectorx
+            _connectorx = connectorx
+        except ImportError:
+            log.info("connectorx is not installed. Candles will be read through COPY.")
+            _connectorx = False
+    return _connectorx or None
+
 def get_latest_timestamp(conn, table_name: str) -> datetime | None:
     """
     Retrieves the most recent 'open_time' from a specified table.
@@ -67,47 +208,174 @@ def get_latest_timestamp(conn, table_name: str) -> datetime | None:
         log.error(f"Error getting latest timestamp from '{table_name}': {e}")
         return None
 
-def get_daily_candle_counts(db_config: dict, table_name: str) -> list[tuple] | None:
+def get_gap_days(db_config: dict, table_name: str, expected: int = 1440, since=None) -> list[tuple] | None:
     """
-    Counts the number of 1-minute candles per day in the database for data integrity checks.
-    This helps identify days with missing data that need to be backfilled.
+    Finds the completed UTC days that hold fewer than `expected` 1-minute candles,
+    for data integrity checks. The days are counted and filtered in the database, so
+    only the deficient days are transferred. The current, still-forming day is excluded.
 
     Args:
         db_config (dict): Database connection configuration.
         table_name (str): The name of the table to analyze.
+        expected (int, optional): Candles in a complete day. Defaults to 1440.
+        since (date, optional): First UTC day to check. Defaults to None (the whole table).
 
     Returns:
         list[tuple] | None: A list of (date, count) tuples, or None on error.
     """
-    log.info(f"Counting daily records for '{table_name}'...")
-    conn = get_db_connection(db_config)
+    log.info(f"Looking for incomplete days in '{table_name}'...")
+    conn = get_pooled_connection(db_config)
     if not conn: return None
     try:
-        # This SQL query casts the timestamp to a date and groups by that day
         query = f"""
         SELECT 
             DATE(open_time AT TIME ZONE 'UTC') as candle_date, 
             COUNT(1) as candle_count
         FROM "{table_name}"
+        WHERE open_time < date_trunc('day', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+          AND open_time >= COALESCE(%s::date, '-infinity'::date)::timestamp AT TIME ZONE 'UTC'
         GROUP BY candle_date
+        HAVING COUNT(1) < %s
         ORDER BY candle_date ASC;
         """
         with conn.cursor() as cur:
-            cur.execute(query)
+            cur.execute(query, (since, expected))
             results = cur.fetchall()
-        log.info(f"Successfully analyzed daily counts for {len(results)} days.")
         return results
     except Exception as e:
-        log.error(f"Error counting daily candles for '{table_name}': {e}")
+        log.error(f"Error looking for incomplete days in '{table_name}': {e}")
         return None
     finally:
-        if conn: conn.close()
+        release_connection(conn)
+
+def _create_integrity_state_table(cur):
+    """Creates the table that records how far each candle table has been checked for gaps."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS integrity_state (
+        table_name TEXT PRIMARY KEY, last_checked_day DATE, last_checked_at TIMESTAMPTZ
+    );
+    """)
+
+def get_last_checked_day(db_config: dict, table_name: str):
+    """
+    Returns the first UTC day that the integrity checker still has to examine for
+    `table_name`. Every earlier day was complete at the last check.
+
+    Args:
+        db_config (dict): Database connection configuration.
+        table_name (str): The candle table to look up.
+
+    Returns:
+        date | None: The day to resume from, or None if the table was never checked.
+    """
+    conn = get_pooled_connection(db_config)
+    if not conn: return None
+    try:
+        with conn.cursor() as cur:
+            _create_integrity_state_table(cur)
+            cur.execute("SELECT last_checked_day FROM integrity_state WHERE table_name = %s;", (table_name,))
+            row = cur.fetchone()
+            conn.commit()
+        return row[0] if row else None
+    except Exception as e:
+        log.error(f"Error reading the integrity state of '{table_name}': {e}")
+        conn.rollback()
+        return None
+    finally:
+        release_connection(conn)
+
+def set_last_checked_day(db_config: dict, table_name: str, day):
+    """
+    Records that every day of `table_name` before `day` is complete, so that the next
+    integrity check can start from `day` instead of scanning the whole table.
+
+    Args:
+        db_config (dict): Database connection configuration.
+        table_name (str): The candle table that was checked.
+        day (date): The first UTC day that still needs checking.
+    """
+    conn = get_pooled_connection(db_config)
+    if not conn: return
+    query = """
+    INSERT INTO integrity_state (table_name, last_checked_day, last_checked_at)
+    VALUES (%s, %s, now())
+    ON CONFLICT (table_name)
+    DO UPDATE SET last_checked_day = EXCLUDED.last_checked_day, last_checked_at = EXCLUDED.last_checked_at;
+    """
+    try:
+        with conn.cursor() as cur:
+            _create_integrity_state_table(cur)
+            cur.execute(query, (table_name, day))
+            conn.commit()
+    except Exception as e:
+        log.error(f"Error saving the integrity state of '{table_name}': {e}")
+        conn.rollback()
+    finally:
+        release_connection(conn)
+
+def _read_candle_query(db_config: dict, query: str, params: tuple, table_name: str) -> pd.DataFrame | None:
+    """
+    Runs a candle SELECT and returns its rows as a DataFrame indexed by UTC 'open_time',
+    with CANDLE_DTYPES columns and incomplete rows dropped. Shared by the candle readers.
+
+    Args:
+        db_config (dict): Database connection configuration.
+        query (str): A SELECT of 'open_time' and the CANDLE_DTYPES columns, with %s placeholders.
+                     It must not end with a semicolon, since it is wrapped in COPY.
+        params (tuple): The values of the placeholders.
+        table_name (str): The table being read, for log messages.
+
+    Returns:
+        pd.DataFrame | None: The candles, or None on error.
+    """
+    # When connectorx is installed, it reads the result with its Rust client straight into
+    # column buffers, skipping the CSV text round trip. Any failure falls back to COPY.
+    connectorx = _load_connectorx()
+    if connectorx is not None:
+        try:
+            # connectorx takes literal SQL, so the parameters are quoted with psycopg2's adapters.
+            select_sql = query % tuple(psycopg2.extensions.adapt(param).getquoted().decode() for param in params)
+            df = connectorx.read_sql(get_db_uri(db_config), select_sql, return_type='pandas')
+            df = df.set_index('open_time').astype(CANDLE_DTYPES)
+            df.index = pd.to_datetime(df.index, utc=True)
+            df.dropna(inplace=True)
+            return df
+        except Exception as e:
+            log.warning(f"connectorx could not read '{table_name}', falling back to COPY: {e}")
+
+    conn = get_pooled_connection(db_config)
+    if not conn: return None
+    try:
+        # Stream the rows out as CSV and let pandas' C parser build the columns,
+        # rather than materializing one Python tuple per row through the cursor.
+        # The CSV text spills to a temporary file beyond COPY_SPOOL_MAX_BYTES, so a
+        # multi-year range does not hold the text and the DataFrame in memory together.
+        with tempfile.SpooledTemporaryFile(max_size=COPY_SPOOL_MAX_BYTES) as buffer:
+            with conn.cursor() as cur:
+                select_sql = cur.mogrify(query, params).decode()
+                cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+            buffer.seek(0)
+            df = pd.read_csv(buffer, index_col='open_time', dtype=CANDLE_DTYPES)
+        df.index = pd.to_datetime(df.index, utc=True, format='ISO8601')
+        df.dropna(inplace=True)
+        return df
+    except Exception as e:
+        log.error(f"Error fetching candle data from '{table_name}': {e}")
+        return None
+    finally:
+        release_connection(conn)
 
 def fetch_candles_for_range(db_config: dict, asset: str, start_dt, end_dt, interval: str = '1m') -> pd.DataFrame | None:
     """
     Fetches raw candle data for a specific asset and date range into a pandas DataFrame,
     which is the primary data source for backtesting and pre-loading strategies.
 
+    Open, high, low and volume are returned as float32, which halves their memory
+    and the bytes moved by vectorized indicator code. float32 keeps about 7
+    significant digits, i.e. roughly one cent on a $70,000 price, which is enough
+    for indicators and stop levels but not for exact satoshi amounts. 'close_price'
+    is kept as float64 since returns and equity are compounded from it.
+
     Args:
         db_config (dict): Database connection configuration.
         asset (str): The asset symbol (e.g., 'BTC-USDT').
@@ -120,29 +388,71 @@ def fetch_candles_for_range(db_config: dict, asset: str, start_dt, end_dt, inter
     """
     table_name = f"{asset.replace('-', '').lower()}_{interval}_candles" 
     log.info(f"Fetching candle data from table: '{table_name}'")
-    query = f'SELECT open_time, open_price, high_price, low_price, close_price, volume FROM "{table_name}" WHERE open_time >= %s AND open_time < %s ORDER BY open_time ASC;'
-    conn = get_db_connection(db_config)
-    if not conn: return None
-    try:
-        df = pd.read_sql_query(query, conn, params=(start_dt, end_dt), index_col='open_time')
-        # Ensure numeric columns are of the correct type for calculations.
-        numeric_cols = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        df.dropna(inplace=True)
+    # The prices are cast to float8 in the database, as in fetch_resampled_candles, so the
+    # server formats 8-byte floats instead of arbitrary-precision NUMERIC text.
+    query = f'SELECT open_time, open_price::float8 AS open_price, high_price::float8 AS high_price, low_price::float8 AS low_price, close_price::float8 AS close_price, volume::float8 AS volume FROM "{table_name}" WHERE open_time >= %s AND open_time < %s ORDER BY open_time ASC'
+
+    df = _read_candle_query(db_config, query, (start_dt, end_dt), table_name)
+    if df is not None:
         log.info(f"Successfully fetched {len(df)} records from '{table_name}'.")
-        return df
-    except Exception as e:
-        log.error(f"Error fetching candle data: {e}")
-        return None
-    finally:
-        if conn: conn.close()
+    return df
+
+def _timeframe_to_pg_interval(timeframe: str) -> str:
+    """Converts a strategy timeframe (e.g., '15m', '1h', '1d') to a PostgreSQL interval string."""
+    return f"{int(pd.Timedelta(timeframe_to_offset(timeframe)).total_seconds())} seconds"
+
+def fetch_resampled_candles(db_config: dict, asset: str, start_dt, end_dt, timeframe: str, interval: str = '1m') -> pd.DataFrame | None:
+    """
+    Fetches candle data already aggregated into OHLCV bars of the given timeframe.
+    The aggregation runs inside PostgreSQL, so only the resampled bars are transferred
+    (e.g., 15x fewer rows for a '15m' timeframe) and no pandas resample is needed.
+
+    Bars are aligned to the Unix epoch, like the live aggregation in the trader, so bars
+    that divide a day start at midnight UTC and multi-day bars (e.g., '3d') line up too.
+
+    Args:
+        db_config (dict): Database connection configuration.
+        asset (str): The asset symbol (e.g., 'BTC-USDT').
+        start_dt (datetime): The start of the date range (inclusive).
+        end_dt (datetime): The end of the date range (exclusive).
+        timeframe (str): The bar timeframe to aggregate into (e.g., '15m', '1h').
+        interval (str, optional): The interval of the stored candles. Defaults to '1m'.
+
+    Returns:
+        pd.DataFrame | None: A DataFrame with the same columns as `fetch_candles_for_range`,
+                             indexed by each bar's 'open_time', or None on error.
+    """
+    table_name = f"{asset.replace('-', '').lower()}_{interval}_candles"
+    log.info(f"Fetching {timeframe} bars aggregated from table: '{table_name}'")
+    # The bucket is aliased 'open_time' for the shared reader, so GROUP BY and ORDER BY
+    # refer to it by position: by name they would resolve to the table's own column.
+    query = f"""
+    SELECT
+        date_bin(%s::interval, open_time, TIMESTAMPTZ '1970-01-01 00:00:00+00') AS open_time,
+        (array_agg(open_price ORDER BY open_time ASC))[1]::float8 AS open_price,
+        MAX(high_price)::float8 AS high_price,
+        MIN(low_price)::float8 AS low_price,
+        (array_agg(close_price ORDER BY open_time DESC))[1]::float8 AS close_price,
+        SUM(volume)::float8 AS volume
+    FROM "{table_name}"
+    WHERE open_time >= %s AND open_time < %s
+    GROUP BY 1
+    ORDER BY 1 ASC
+    """
+    df = _read_candle_query(db_config, query, (_timeframe_to_pg_interval(timeframe), start_dt, end_dt), table_name)
+    if df is not None:
+        log.info(f"Successfully fetched {len(df)} {timeframe} bars from '{table_name}'.")
+    return df
 
 # --- Write Operations ---
 def create_candles_table(conn, table_name: str):
     """
     Creates a new table for storing candle data if it doesn't already exist.
-    The 'open_time' is set as the PRIMARY KEY to enforce uniqueness.
+    The 'open_time' is set as the PRIMARY KEY to enforce uniqueness. Prices and
+    volumes are stored as DOUBLE PRECISION: every consumer works in floating point,
+    and fixed-width doubles are smaller and faster to read than NUMERIC. Candles are
+    appended in time order, so a small BRIN index on 'open_time' lets range scans
+    (backtests, preloads) skip whole blocks of the table cheaply.
 
     Args:
         conn (psycopg2.connection): An active database connection.
@@ -150,11 +460,13 @@ def create_candles_table(conn, table_name: str):
     """
     query = f"""
     CREATE TABLE IF NOT EXISTS "{table_name}" (
-        open_time TIMESTAMPTZ PRIMARY KEY, open_price NUMERIC, high_price NUMERIC,
-        low_price NUMERIC, close_price NUMERIC, volume NUMERIC, close_time TIMESTAMPTZ,
-        quote_asset_volume NUMERIC, number_of_trades BIGINT, taker_buy_base_asset_volume NUMERIC,
-        taker_buy_quote_asset_volume NUMERIC, ignore TEXT
+        open_time TIMESTAMPTZ PRIMARY KEY, open_price DOUBLE PRECISION, high_price DOUBLE PRECISION,
+        low_price DOUBLE PRECISION, close_price DOUBLE PRECISION, volume DOUBLE PRECISION, close_time TIMESTAMPTZ,
+        quote_asset_volume DOUBLE PRECISION, number_of_trades BIGINT, taker_buy_base_asset_volume DOUBLE PRECISION,
+        taker_buy_quote_asset_volume DOUBLE PRECISION, ignore TEXT
     );
+    CREATE INDEX IF NOT EXISTS "{table_name}_open_time_brin"
+        ON "{table_name}" USING BRIN (open_time) WITH (pages_per_range = 32);
     """
     try:
         with conn.cursor() as cur:
@@ -164,6 +476,135 @@ def create_candles_table(conn, table_name: str):
     except Exception as e:
         log.error(f"Error creating table '{table_name}': {e}")
         conn.rollback()
+        return
+    _convert_to_hypertable(conn, table_name)
+
+def _convert_to_hypertable(conn, table_name: str):
+    """
+    Turns a candle table into a TimescaleDB hypertable chunked by 'open_time', when
+    the database has the timescaledb extension. Range reads then only visit the
+    chunks that overlap the range. On plain PostgreSQL this does nothing.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb';")
+            if cur.fetchone() is None:
+                conn.commit()
+                return
+            # Converting a table that already holds data would have to rewrite it, so only
+            # new (empty) tables are converted; hypertables are left as they are.
+            cur.execute(
+                "SELECT create_hypertable(%s, 'open_time', chunk_time_interval => INTERVAL %s, if_not_exists => TRUE);",
+                (f'"{table_name}"', HYPERTABLE_CHUNK_INTERVAL)
+            )
+            conn.commit()
+        log.info(f"Table '{table_name}' is a TimescaleDB hypertable.")
+    except Exception as e:
+        log.warning(f"Could not convert '{table_name}' to a hypertable, keeping a plain table: {e}")
+        conn.rollback()
+
+def migrate_candles_table_to_double(conn, table_name: str) -> bool:
+    """
+    Converts the NUMERIC columns of a candle table created before the switch to
+    DOUBLE PRECISION. The table is rewritten under an exclusive lock, so this is a
+    one-off maintenance step to run while nothing else writes to it.
+
+    Args:
+        conn (psycopg2.connection): An active database connection.
+        table_name (str): The name of the table to migrate.
+
+    Returns:
+        bool: True if the table is (now) fully DOUBLE PRECISION, False on error.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s AND data_type = 'numeric' ORDER BY ordinal_position;",
+                (table_name,)
+            )
+            numeric_columns = [row[0] for row in cur.fetchall()]
+            if not numeric_columns:
+                conn.commit()
+                log.info(f"Table '{table_name}' has no NUMERIC columns to migrate.")
+                return True
+            alterations = ', '.join(f'ALTER COLUMN {col} TYPE DOUBLE PRECISION USING {col}::double precision' for col in numeric_columns)
+            log.info(f"Migrating {len(numeric_columns)} NUMERIC column(s) of '{table_name}' to DOUBLE PRECISION...")
+            cur.execute(f'ALTER TABLE "{table_name}" {alterations};')
+            conn.commit()
+        log.info(f"✅ Table '{table_name}' migrated.")
+        return True
+    except Exception as e:
+        log.error(f"Error migrating table '{table_name}': {e}")
+        conn.rollback()
+        return False
+
+def _transform_rows(rows: list, source: str) -> Iterator[tuple]:
+    """
+    Converts raw Binance kline rows into tuples in CANDLE_COLUMNS order.
+    The batch is transposed into columns, and the millisecond open/close times and
+    the numeric strings of the whole batch are each converted in one vectorized call
+    rather than once per row. The converted columns are a full copy of the batch;
+    only the final tuples are assembled lazily, by zip, as the writer reads them.
+    Batches are at most one API response or one day (<= 1440 rows), and the writers
+    send each batch in one go (one COPY buffer or one INSERT), so memory use grows
+    with the batch, not with a page size.
+
+    Args:
+        rows (list): Kline rows from the Binance API.
+        source (str): Value stored in the 'ignore' column to tag where the rows came from.
+
+    Returns:
+        Iterator[tuple]: The rows ready to be written to a candle table.
+    """
+    columns = list(zip(*rows))
+    open_times = pd.to_datetime(np.asarray(columns[0], dtype=np.int64), unit='ms', utc=True).to_pydatetime()
+    close_times = pd.to_datetime(np.asarray(columns[6], dtype=np.int64), unit='ms', utc=True).to_pydatetime()
+    # Binance sends prices and volumes as zero-padded strings (e.g. "27840.12000000").
+    # Parsing them once here, in C, sends the server short float literals instead.
+    ohlcv = np.asarray(columns[1:6], dtype=np.float64).tolist()
+    quote_volume, taker_base_volume, taker_quote_volume = np.asarray(
+        (columns[7], columns[9], columns[10]), dtype=np.float64).tolist()
+    number_of_trades = np.asarray(columns[8], dtype=np.int64).tolist()
+    return zip(open_times, *ohlcv, close_times, quote_volume, number_of_trades,
+               taker_base_volume, taker_quote_volume, itertools.repeat(source))
+
+def _copy_to_temp_table(cur, rows: Iterable[tuple], table_name: str):
+    """
+    Bulk-loads candle rows into a transaction-scoped 'tmp_candles' table shaped like
+    `table_name`. Streaming the rows through COPY avoids having the server parse one
+    large multi-row INSERT; the caller then merges them with a single INSERT ... SELECT.
+
+    Args:
+        cur (psycopg2.cursor): A cursor on the connection that will commit the merge.
+        rows (Iterable[tuple]): Tuples in CANDLE_COLUMNS order.
+        table_name (str): The candle table the temporary table is modelled on.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cur.execute(f'CREATE TEMP TABLE tmp_candles (LIKE "{table_name}" INCLUDING DEFAULTS) ON COMMIT DROP;')
+    cur.copy_expert(f"COPY tmp_candles ({CANDLE_COLUMNS}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _write_rows(cur, rows: Iterable[tuple], row_count: int, table_name: str, conflict_clause: str) -> int:
+    """
+    Writes transformed candle rows to `table_name`, resolving conflicts on open_time
+    with `conflict_clause`. Batches of more than COPY_MIN_ROWS rows go through COPY
+    and a temporary table; smaller ones are sent as a single multi-row INSERT, which
+    is cheaper than creating the temporary table. The surrounding transaction commits
+    asynchronously (see BATCH_WRITE_SETTINGS).
+
+    Returns:
+        int: The number of rows inserted or changed.
+    """
+    cur.execute(BATCH_WRITE_SETTINGS)
+    if row_count > COPY_MIN_ROWS:
+        _copy_to_temp_table(cur, rows, table_name)
+        cur.execute(f'INSERT INTO "{table_name}" AS t ({CANDLE_COLUMNS}) SELECT {CANDLE_COLUMNS} FROM tmp_candles {conflict_clause};')
+    else:
+        # A single page keeps it one statement, so rowcount covers the whole batch.
+        extras.execute_values(cur, f'INSERT INTO "{table_name}" AS t ({CANDLE_COLUMNS}) VALUES %s {conflict_clause};', rows, page_size=row_count)
+    return cur.rowcount
 
 def insert_batch_data(conn, data: list, table_name: str) -> int:
     """
@@ -180,13 +621,11 @@ def insert_batch_data(conn, data: list, table_name: str) -> int:
         int: The number of new rows inserted.
     """
     if not data: return 0
-    transformed_data = [(datetime.fromtimestamp(row[0]/1000, tz=timezone.utc), row[1], row[2], row[3], row[4], row[5], datetime.fromtimestamp(row[6]/1000, tz=timezone.utc), row[7], row[8], row[9], row[10], 'historical') for row in data]
-    query = f'INSERT INTO "{table_name}" (open_time, open_price, high_price, low_price, close_price, volume, close_time, quote_asset_volume, number_of_trades, taker_buy_base_asset_volume, taker_buy_quote_asset_volume, ignore) VALUES %s ON CONFLICT (open_time) DO NOTHING;'
+    transformed_data = _transform_rows(data, 'historical')
     
     try:
         with conn.cursor() as cur:
-            extras.execute_values(cur, query, transformed_data)
-            inserted_count = cur.rowcount
+            inserted_count = _write_rows(cur, transformed_data, len(data), table_name, 'ON CONFLICT (open_time) DO NOTHING')
             conn.commit()
         return inserted_count
     except Exception as e:
@@ -194,6 +633,33 @@ def insert_batch_data(conn, data: list, table_name: str) -> int:
         conn.rollback()
         return 0
 
+def _realtime_row(k: dict) -> tuple:
+    """
+    Converts a closed WebSocket kline into a row for REALTIME_ROW_TEMPLATE. The
+    string prices and volumes are cast to float once here, like in _transform_rows.
+    """
+    return (k['t']/1000, float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']),
+            k['T']/1000, float(k['q']), int(k['n']), float(k['V']), float(k['Q']), 'realtime')
+
+def _prepare_realtime_upsert(conn, cur, table_name: str) -> str | None:
+    """
+    Prepares the real-time upsert for `table_name` once per database session, so
+    that the server parses and plans it only once instead of for every candle.
+
+    Returns:
+        str | None: The prepared statement's name, or None if `conn` is not a
+                    CandleDBConnection and cannot track its prepared statements.
+    """
+    prepared = getattr(conn, 'prepared_statements', None)
+    if prepared is None: return None
+    statement = f"upsert_realtime_{table_name}"
+    if statement not in prepared:
+        parameters = REALTIME_ROW_TEMPLATE.replace('%s', '{}').format(*(f'${i}' for i in range(1, 13)))
+        cur.execute(f'PREPARE "{statement}" AS INSERT INTO "{table_name}" AS t ({CANDLE_COLUMNS}) VALUES ({parameters}) {UPSERT_ON_CONFLICT};')
+        # Prepared statements belong to the session and survive a rolled-back transaction.
+        prepared.add(statement)
+    return statement
+
 def upsert_realtime_candle(conn, candle_data: dict, table_name: str):
     """
     Inserts or updates a single candle from a real-time WebSocket stream.
@@ -209,30 +675,200 @@ def upsert_realtime_candle(conn, candle_data: dict, table_name: str):
     k = candle_data.get('k', {})
     if not k.get('x'): return
     log.info(f"🕯️  New closed candle received for {table_name}: {datetime.fromtimestamp(k['t']/1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}")
-    query = f"""
-    INSERT INTO "{table_name}" (open_time, open_price, high_price, low_price, close_price, volume, close_time, quote_asset_volume, number_of_trades, taker_buy_base_asset_volume, taker_buy_quote_asset_volume, ignore) 
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
-    ON CONFLICT (open_time) 
-    DO UPDATE SET 
-        close_price = EXCLUDED.close_price, high_price = EXCLUDED.high_price, 
-        low_price = EXCLUDED.low_price, volume = EXCLUDED.volume, 
-        number_of_trades = EXCLUDED.number_of_trades;
-    """
-    data_tuple = (datetime.fromtimestamp(k['t']/1000, tz=timezone.utc), k['o'], k['h'], k['l'], k['c'], k['v'], datetime.fromtimestamp(k['T']/1000, tz=timezone.utc), k['q'], k['n'], k['V'], k['Q'], 'realtime')
+    data_tuple = _realtime_row(k)
     try:
         with conn.cursor() as cur:
-            cur.execute(query, data_tuple)
+            statement = _prepare_realtime_upsert(conn, cur, table_name)
+            if statement:
+                cur.execute(f'EXECUTE "{statement}" ({REALTIME_ROW_PLACEHOLDERS});', data_tuple)
+            else:
+                cur.execute(f'INSERT INTO "{table_name}" AS t ({CANDLE_COLUMNS}) VALUES ({REALTIME_ROW_TEMPLATE}) {UPSERT_ON_CONFLICT};', data_tuple)
             conn.commit()
         log.info("    💾 Record inserted/updated successfully.")
     except Exception as e:
         log.error(f"Error upserting candle into '{table_name}': {e}")
         conn.rollback()
 
+def upsert_realtime_candles(conn, candles: list[dict], table_name: str) -> int:
+    """
+    Inserts or updates a batch of closed candles from a real-time WebSocket stream
+    in a single round trip and transaction, so that candles arriving together share
+    one commit instead of paying for one each. On an autocommit connection the
+    batch commits itself, without separate BEGIN and COMMIT round trips.
+
+    On a CandleDBConnection the candles run through the table's prepared upsert, so
+    the statement is not parsed and planned again at every flush.
+
+    Args:
+        conn (psycopg2.connection): An active database connection.
+        candles (list[dict]): WebSocket kline messages, each holding its candle under 'k'.
+        table_name (str): The name of the table to upsert into.
+
+    Returns:
+        int | None: The number of candles written, or None if the write failed.
+    """
+    # Keep the latest message per open time; a statement cannot update the same row twice.
+    klines = {c['k']['t']: c['k'] for c in candles if c.get('k', {}).get('x')}
+    if not klines: return 0
+    data_tuples = [_realtime_row(k) for k in klines.values()]
+    try:
+        with conn.cursor() as cur:
+            statement = _prepare_realtime_upsert(conn, cur, table_name)
+            if statement:
+                # A single page sends every EXECUTE in one query string, i.e. one round trip.
+                extras.execute_batch(cur, f'EXECUTE "{statement}" ({REALTIME_ROW_PLACEHOLDERS});', data_tuples, page_size=len(data_tuples))
+            else:
+                query = f'INSERT INTO "{table_name}" AS t ({CANDLE_COLUMNS}) VALUES %s {UPSERT_ON_CONFLICT};'
+                extras.execute_values(cur, query, data_tuples, template=f"({REALTIME_ROW_TEMPLATE})")
+            conn.commit()
+        log.info(f"💾 Upserted {len(data_tuples)} closed candle(s) into {table_name}, latest: {datetime.fromtimestamp(max(klines) / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}")
+        return len(data_tuples)
+    except Exception as e:
+        log.error(f"Error upserting candles into '{table_name}': {e}")
+        # A connection lost mid-write is already closed and cannot be rolled back.
+        if not conn.closed: conn.rollback()
+        return None
+
+class RealtimeCandleWriter:
+    """
+    Coalesces closed real-time candles and writes them in batches from a background thread.
+
+    WebSocket callbacks `push` candles and return immediately. The writer thread
+    flushes the buffer with `upsert_realtime_candles`, one batch per table, every
+    `max_delay_seconds`, or as soon as `max_batch_size` candles are waiting. It owns
+    a dedicated autocommit connection, which is reopened if it drops.
+
+    Candles whose write fails are put back in the buffer. While the database is
+    unreachable, reconnects and writes are retried with an exponential backoff, and
+    the buffer keeps at most `max_pending` candles, dropping (and counting) the oldest.
+    """
+    RETRY_MIN_SECONDS = 1.0
+    RETRY_MAX_SECONDS = 60.0
+
+    def __init__(self, db_config: dict, max_batch_size: int = 32, max_delay_seconds: float = 0.2, max_pending: int = 10_000):
+        """
+        Initializes the writer. No thread runs until `start` is called.
+
+        Args:
+            db_config (dict): Database connection configuration.
+            max_batch_size (int, optional): Buffered candles that trigger an early flush. Defaults to 32.
+            max_delay_seconds (float, optional): Longest time a candle waits in the buffer. Defaults to 0.2.
+            max_pending (int, optional): Most candles buffered while writes fail. Defaults to 10,000
+                                         (about a week of candles for one asset).
+        """
+        self.db_config = db_config
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self.max_pending = max_pending
+        self._pending = defaultdict(list) # table_name -> closed candle messages
+        self._pending_count = 0
+        self._dropped_count = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        """Starts the writer thread, if it is not already running."""
+        if self._thread is not None: return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="realtime-candle-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the writer thread after a final flush of the buffered candles."""
+        if self._thread is None: return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def push(self, candle_data: dict, table_name: str):
+        """Buffers a closed candle message for `table_name`."""
+        with self._lock:
+            self._pending[table_name].append(candle_data)
+            self._pending_count += 1
+            self._trim(table_name)
+            if self._pending_count >= self.max_batch_size:
+                self._wake.set()
+
+    def _trim(self, table_name: str):
+        """Drops the oldest candles of `table_name` while the buffer exceeds `max_pending`. Requires the lock."""
+        excess = self._pending_count - self.max_pending
+        if excess > 0:
+            candles = self._pending[table_name]
+            excess = min(excess, len(candles))
+            del candles[:excess]
+            self._pending_count -= excess
+            self._dropped_count += excess
+
+    def _run(self):
+        conn = None
+        retry_delay = 0.0 # Current backoff; 0 while writes succeed
+        retry_at = 0.0
+        try:
+            while True:
+                self._wake.wait(self.max_delay_seconds)
+                self._wake.clear()
+                stopping = self._stopping
+                # After a failure, nothing is attempted until the backoff has passed,
+                # except for the final flush when stopping.
+                if stopping or time.monotonic() >= retry_at:
+                    if conn is None or conn.closed:
+                        conn = get_db_connection(self.db_config)
+                        if conn is not None:
+                            # Each flush is one round trip per table, so autocommit saves
+                            # the separate BEGIN and COMMIT round trips.
+                            conn.autocommit = True
+                    if conn is not None and self._flush(conn):
+                        if retry_delay:
+                            log.info("✅ Real-time candle writes have recovered.")
+                        retry_delay = 0.0
+                    else:
+                        retry_delay = min(max(2 * retry_delay, self.RETRY_MIN_SECONDS), self.RETRY_MAX_SECONDS)
+                        retry_at = time.monotonic() + retry_delay
+                        log.warning(f"Real-time candle writes failed; {self._pending_count} candle(s) buffered, "
+                                    f"{self._dropped_count} dropped so far. Retrying in {retry_delay:g}s.")
+                if stopping:
+                    if self._pending_count:
+                        log.error(f"Stopping with {self._pending_count} real-time candle(s) that could not be written.")
+                    break
+        finally:
+            if conn: conn.close()
+
+    def _flush(self, conn) -> bool:
+        """
+        Upserts every buffered candle, with one batch per table. The candles of a
+        failed batch are put back in the buffer, ahead of any pushed since.
+
+        Returns:
+            bool: True if every batch was written (or nothing was buffered).
+        """
+        with self._lock:
+            if not self._pending: return True
+            pending, self._pending = self._pending, defaultdict(list)
+            self._pending_count = 0
+        success = True
+        for table_name, candles in pending.items():
+            try:
+                written = upsert_realtime_candles(conn, candles, table_name)
+            except Exception as e:
+                log.error(f"Unexpected error writing real-time candles to '{table_name}': {e}")
+                written = None
+            if written is None:
+                success = False
+                with self._lock:
+                    self._pending[table_name][:0] = candles
+                    self._pending_count += len(candles)
+                    self._trim(table_name)
+        return success
+
 def upsert_batch_data(conn, data: list, table_name: str) -> int:
     """
     De-duplicates and then "upserts" (inserts or updates) a batch of candle data.
     This is used by the data integrity checker to fill gaps, ensuring that existing
-    records are updated if necessary.
+    records are updated if necessary. Existing rows whose values are unchanged are
+    left untouched, so re-filling a day does not rewrite (and bloat) the table.
 
     Args:
         conn (psycopg2.connection): An active database connection.
@@ -240,39 +876,25 @@ def upsert_batch_data(conn, data: list, table_name: str) -> int:
         table_name (str): The name of the table to upsert into.
 
     Returns:
-        int: The number of rows affected (inserted or updated).
+        int: The number of rows affected (inserted or changed).
     """
     if not data: return 0
 
     # --- De-duplication Logic ---
     # The API can sometimes return duplicate timestamps. We must ensure the data is unique
     # before sending it to the database to avoid the "cannot affect row a second time" error.
-    unique_data = {}
-    for row in data:
-        # Use the open_time (the first element) as the unique key
-        unique_data[row[0]] = row
-    
-    # Get the de-duplicated list of records
-    deduplicated_data = list(unique_data.values())
+    # The open_time (the first element) is the unique key; later rows win. Sorting by it
+    # makes the merge walk the primary key index in order.
+    deduplicated_data = sorted({row[0]: row for row in data}.values(), key=itemgetter(0))
     if len(data) != len(deduplicated_data):
         log.warning(f"Removed {len(data) - len(deduplicated_data)} duplicate records from API response.")
 
     # Transform raw API data into the format expected by the database table.
-    transformed_data = [(datetime.fromtimestamp(row[0]/1000, tz=timezone.utc), row[1], row[2], row[3], row[4], row[5], datetime.fromtimestamp(row[6]/1000, tz=timezone.utc), row[7], row[8], row[9], row[10], 'historical_fill') for row in deduplicated_data]
+    transformed_data = _transform_rows(deduplicated_data, 'historical_fill')
     
-    query = f"""
-    INSERT INTO "{table_name}" (open_time, open_price, high_price, low_price, close_price, volume, close_time, quote_asset_volume, number_of_trades, taker_buy_base_asset_volume, taker_buy_quote_asset_volume, ignore) 
-    VALUES %s 
-    ON CONFLICT (open_time) 
-    DO UPDATE SET 
-        close_price = EXCLUDED.close_price, high_price = EXCLUDED.high_price, 
-        low_price = EXCLUDED.low_price, volume = EXCLUDED.volume, 
-        number_of_trades = EXCLUDED.number_of_trades;
-    """
     try:
         with conn.cursor() as cur:
-            extras.execute_values(cur, query, transformed_data)
-            inserted_count = cur.rowcount
+            inserted_count = _write_rows(cur, transformed_data, len(deduplicated_data), table_name, UPSERT_ON_CONFLICT)
             conn.commit()
         return inserted_count
     except Exception as e:
@@ -1,26 +1,35 @@
 import requests
-import time
 import pandas as pd
 from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
 import argparse
 
 # --- Configuration ---
 BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
-def fetch_full_day_data(asset: str, interval: str, day: datetime.date):
+# Add the repository root to Python's path, so the shared settings can be imported
+sys.path.insert(0, os.path.dirname(PROJECT_ROOT))
+from trading_system.utils.common import REQUEST_TIMEOUT_SECONDS
+
+MAX_CONCURRENT_REQUESTS = 5 # Kline requests weigh 2, far below Binance's per-minute weight limit
+
+def _fetch_batch(session: requests.Session, params: dict) -> list:
+    """Fetches a single batch of klines, raising on HTTP errors."""
+    response = session.get(BINANCE_API_URL, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.json()
+
+def _day_batch_params(asset: str, interval: str, day: datetime.date) -> list[dict]:
     """
-    Fetches all 1-minute candle data for a single day from Binance.
-    The API limit is 1000 records, so two calls are needed for a full day (1440 minutes).
+    Builds the request parameters covering a full day of 1-minute candles.
+    The API limit is 1000 records, so two batches are needed for a full day (1440 minutes).
     """
-    print(f"--- Fetching full day data for {asset} on {day} ---")
-    
-    all_day_data = []
-    
     # Define the start of the target day in UTC
     start_of_day = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
-    
+
     # Batch 1: First 1000 minutes of the day
     params1 = {
         'symbol': asset.replace('-', ''), 
@@ -37,29 +46,67 @@ def fetch_full_day_data(asset: str, interval: str, day: datetime.date):
         'startTime': int(start_of_batch2.timestamp() * 1000), 
         'limit': 440 # Remaining minutes
     }
+    return [params1, params2]
+
+def fetch_full_day_data(asset: str, interval: str, day: datetime.date, session: requests.Session = None):
+    """
+    Fetches all 1-minute candle data for a single day from Binance.
+
+    Both batches of the day are requested concurrently over a shared session.
+
+    Args:
+        asset (str): The asset to fetch (e.g., BTC-USDT).
+        interval (str): The candle interval (e.g., '1m').
+        day (datetime.date): The UTC day to fetch.
+        session (requests.Session, optional): Session to reuse. A new one is created if omitted.
+
+    Returns:
+        list: The raw klines of the day in chronological order, or None on error.
+    """
+    print(f"--- Fetching full day data for {asset} on {day} ---")
+    
+    owns_session = session is None
+    if owns_session:
+        session = requests.Session()
 
     try:
-        print(f"⬇️  Fetching first batch of 1000 records...")
-        response1 = requests.get(BINANCE_API_URL, params=params1)
-        response1.raise_for_status()
-        data1 = response1.json()
-        all_day_data.extend(data1)
-        print(f"    ✅ Fetched {len(data1)} records.")
-        
-        time.sleep(1) # Pause between requests
-
-        print(f"⬇️  Fetching second batch of records...")
-        response2 = requests.get(BINANCE_API_URL, params=params2)
-        response2.raise_for_status()
-        data2 = response2.json()
-        all_day_data.extend(data2)
-        print(f"    ✅ Fetched {len(data2)} records.")
-        
+        print(f"⬇️  Fetching both batches of the day concurrently...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batches = list(executor.map(lambda params: _fetch_batch(session, params),
+                                        _day_batch_params(asset, interval, day)))
+
+        all_day_data = [kline for batch in batches for kline in batch]
+        print(f"    ✅ Fetched {' + '.join(str(len(batch)) for batch in batches)} records.")
         return all_day_data
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching full day data for {day}: {e}")
         return None
+    finally:
+        if owns_session:
+            session.close()
+
+def fetch_many_days(asset: str, days: list, interval: str = '1m') -> dict:
+    """
+    Fetches full-day candle data for several days in parallel.
+
+    Args:
+        asset (str): The asset to fetch (e.g., BTC-USDT).
+        days (list): The UTC days (datetime.date) to fetch.
+        interval (str, optional): The candle interval. Defaults to '1m'.
+
+    Returns:
+        dict: Maps each day to its klines, or to None if its fetch failed.
+    """
+    # Each day fetches its two batches concurrently, so bound the days in flight
+    # to keep the total number of open requests near MAX_CONCURRENT_REQUESTS.
+    max_days_in_flight = max(MAX_CONCURRENT_REQUESTS // 2, 1)
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers=max_days_in_flight) as executor:
+            results = executor.map(lambda day: fetch_full_day_data(asset, interval, day, session), days)
+            return dict(zip(days, results))
 
 def save_to_csv(data: list, asset: str, day: datetime.date):
     """Saves the fetched data to a CSV file in the output folder."""
@@ -72,14 +119,13 @@ def save_to_csv(data: list, asset: str, day: datetime.date):
         "close_time", "quote_asset_volume", "number_of_trades",
         "taker_buy_base_asset_volume", "taker_buy_quote_asset_volume", "ignore"
     ]
-    
-    # Convert timestamps from milliseconds to human-readable format for the CSV
-    for row in data:
-        row[0] = datetime.fromtimestamp(row[0] / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
-        row[6] = datetime.fromtimestamp(row[6] / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
     df = pd.DataFrame(data, columns=headers)
 
+    # Convert timestamps from milliseconds in one vectorized pass; to_csv formats them below
+    for column in ('open_time', 'close_time'):
+        df[column] = pd.to_datetime(df[column], unit='ms', utc=True)
+
     output_dir = os.path.join(PROJECT_ROOT, 'output')
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -88,7 +134,7 @@ def save_to_csv(data: list, asset: str, day: datetime.date):
     filename = f"{asset.replace('-', '')}_{day.strftime('%Y-%m-%d')}_fullday.csv"
     filepath = os.path.join(output_dir, filename)
     
-    df.to_csv(filepath, index=False)
+    df.to_csv(filepath, index=False, date_format='%Y-%m-%d %H:%M:%S')
     print(f"✅ Data successfully saved to '{filepath}'")
     print(f"Total records saved: {len(df)}")
 
@@ -98,14 +144,19 @@ def main():
     parser = argparse.ArgumentParser(description="Fetch full-day candle data from Binance and save to CSV.")
     parser.add_argument('--asset', required=True, help="The asset to fetch (e.g., BTC-USDT).")
     parser.add_argument('--date', required=True, help="The specific date to fetch in YYYY-MM-DD format.")
+    parser.add_argument('--days', type=int, default=1, help="Number of consecutive days to fetch, starting at --date (default: 1).")
     args = parser.parse_args()
 
     try:
         target_date = datetime.strptime(args.date, "%Y-%m-%d").date()
         
-        full_day_data = fetch_full_day_data(args.asset, '1m', target_date)
-        
-        save_to_csv(full_day_data, args.asset, target_date)
+        if args.days <= 1:
+            full_day_data = fetch_full_day_data(args.asset, '1m', target_date)
+            save_to_csv(full_day_data, args.asset, target_date)
+        else:
+            days = [target_date + timedelta(days=offset) for offset in range(args.days)]
+            for day, day_data in fetch_many_days(args.asset, days).items():
+                save_to_csv(day_data, args.asset, day)
 
     except ValueError:
         print("❌ Invalid date format. Please use YYYY-MM-DD.")